@@ -0,0 +1,60 @@
+import argparse
+import os
+import random
+import sys
+import time
+import pandas as pd
+
+# Os módulos do projeto são importados da árvore escolhida (--tree) com o loader dos testes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+
+from project_modules import import_project_module, TREES
+
+# Quantidade de valores por coluna no benchmark
+BENCH_ROWS = 1000000
+
+# Função que executa o tratamento original (um lambda por valor), usado como referência
+def clean_column_original(col):
+    return col.apply(lambda x: str(x).strip().replace('"','').replace("'",'') if pd.notnull(x) else "")
+
+# Função que gera os valores das colunas do benchmark: com espaços, aspas e nulos ou já limpos
+def bench_values(rows, dirty):
+    rng = random.Random(0)
+    if not dirty:
+        return [f"valor{index}" for index in range(rows)]
+    return [rng.choice([f" valor{index} ", f"valor{index}", f"'{index}'", f"\"{index}\"\t", None, " x　"]) for index in range(rows)]
+
+# Função que mede o tempo de uma função de limpeza sobre uma coluna
+def timed(clean_func, col):
+    start = time.perf_counter()
+    result = clean_func(col)
+    return result, time.perf_counter() - start
+
+# Função que compara clean_column com o tratamento original nas colunas object e string[pyarrow]
+def main(rows=BENCH_ROWS, tree=TREES[0]):
+    """
+    Para cada dtype (object, usado no read_csv com dtype=str e sem pyarrow, e string[pyarrow])
+    e para colunas sujas e já limpas, mede o tratamento original e clean_column e confere que os
+    dois resultados têm os mesmos valores.
+    """
+    clean_column = import_project_module(tree, "operations.operations_type").clean_column
+    print(f"# Benchmark clean_column ({tree}): {rows} valores por coluna")
+    for dtype in ("object", "string[pyarrow]"):
+        for dirty in (True, False):
+            col = pd.Series(bench_values(rows, dirty), dtype=dtype)
+            expected, original_seconds = timed(clean_column_original, col)
+            result, seconds = timed(clean_column, col)
+            same = result.astype(object).tolist() == expected.astype(object).tolist()
+            print(
+                f"{dtype:<16} {'sujos' if dirty else 'limpos':<7} original={original_seconds:.3f}s "
+                f"clean_column={seconds:.3f}s ({original_seconds / seconds:.1f}x) resultado igual={same}"
+            )
+            if not same:
+                raise AssertionError(f"clean_column diverge do tratamento original ({dtype}, {'sujos' if dirty else 'limpos'})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de clean_column")
+    parser.add_argument("--rows", type=int, default=BENCH_ROWS, help="Quantidade de valores por coluna")
+    parser.add_argument("--tree", choices=TREES, default=TREES[0], help="Árvore do projeto medida")
+    args = parser.parse_args()
+    main(args.rows, args.tree)
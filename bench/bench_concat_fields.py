@@ -0,0 +1,79 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime
+import pandas as pd
+
+# Os módulos do projeto são importados da árvore escolhida (--tree) com o loader dos testes
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+
+from project_modules import import_project_module, TREES
+
+# Quantidade de linhas do benchmark e de linhas medidas no tratamento original (estimado para o total)
+BENCH_ROWS = 10000000
+BENCH_SAMPLE_ROWS = 200000
+
+# Função que executa o tratamento original (data.apply linha a linha), usado como referência
+def concat_fields_original(data, column1, column2):
+    def format_columns(row):
+        column1_str = row[column1]
+        column2_str = row[column2]
+        try:
+            formatted_date = datetime.strptime(column1_str, "%Y%m%d").strftime("%Y-%m-%d")
+            formatted_time = datetime.strptime(column2_str[:6], "%H%M%S").strftime("%H:%M:%S")
+            return f"{formatted_date} {formatted_time}"
+        except ValueError:
+            return f"{column1_str} {column2_str}"
+    return data.apply(format_columns, axis=1, result_type="reduce")
+
+# Função que gera as colunas de data (AAAAMMDD) e hora (HHMMSS) com alguns valores inválidos e incompletos
+def bench_data(rows):
+    rng = random.Random(0)
+    dates = [f"{year}{month:02d}{day:02d}" for year in range(2015, 2025) for month in range(1, 13) for day in range(1, 29)]
+    dates += ["20240229", "20230229", "20241301", "2024011", "00000000"]
+    times = [f"{rng.randrange(24):02d}{rng.randrange(60):02d}{rng.randrange(60):02d}" for _ in range(50000)]
+    times += ["999999", "1234", "101010123", ""]
+    return pd.DataFrame({
+        'fecha': rng.choices(dates, k=rows),
+        'hora': rng.choices(times, k=rows),
+    })
+
+# Função que compara concat_fields com o tratamento original em uma coluna de 10 milhões de linhas
+def main(rows=BENCH_ROWS, tree=TREES[0]):
+    """
+    Mede concat_fields no total de linhas e o tratamento original em BENCH_SAMPLE_ROWS linhas,
+    estimando o tempo do original para o total (custo linear por linha), e confere que os
+    dois resultados são iguais nas linhas da amostra.
+    """
+    concat_fields = import_project_module(tree, "special_functions").concat_fields
+    print(f"# Benchmark concat_fields ({tree}): {rows} linhas")
+    data = bench_data(rows)
+    sample_rows = min(rows, BENCH_SAMPLE_ROWS)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = concat_fields(data, "concat_fields:fecha:hora:fecha_hora")
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = concat_fields_original(data.iloc[:sample_rows], "fecha", "hora")
+    original_seconds = (time.perf_counter() - start) * rows / sample_rows
+
+    same = result['fecha_hora'].iloc[:sample_rows].tolist() == expected.tolist()
+    print(
+        f"original={original_seconds:.1f}s (estimado a partir de {sample_rows} linhas) "
+        f"concat_fields={seconds:.1f}s ({original_seconds / seconds:.1f}x) resultado igual={same}"
+    )
+    if not same:
+        raise AssertionError("concat_fields diverge do tratamento original")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de concat_fields")
+    parser.add_argument("--rows", type=int, default=BENCH_ROWS, help="Quantidade de linhas")
+    parser.add_argument("--tree", choices=TREES, default=TREES[0], help="Árvore do projeto medida")
+    args = parser.parse_args()
+    main(args.rows, args.tree)
@@ -0,0 +1,14 @@
+import os
+import boto3
+
+# Clients S3 criados por processo (um client boto3 não deve ser compartilhado entre processos)
+_S3_CLIENTS = {}
+
+# Função que devolve o client S3 do processo atual, reaproveitado entre chamadas e arquivos
+def get_s3_client():
+    pid = os.getpid()
+    if pid not in _S3_CLIENTS:
+        # Descarta clients herdados de um processo pai (fork)
+        _S3_CLIENTS.clear()
+        _S3_CLIENTS[pid] = boto3.client("s3")
+    return _S3_CLIENTS[pid]
@@ -1,18 +1,249 @@
-import json
-import boto3
 import pandas as pd
 from datetime import datetime
 import argparse
+import os
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
 # Import de libs customizadas
 from special_functions import extract_fecha_ref, apply_special_functions, concat_fields
+from special_functions.apply_hash import apply_hash
 from messaging.publish_message import send_mail_exception
-from operations.operations_type import drop_columns, rename_columns, add_columns, dateFormat, save_to_s3_transient_zone, defined_filename_output, move_to_backup, clear_s3_directory, count_lines_in_s3_file, clean_column
+from operations.operations_type import drop_columns, rename_columns, add_columns, encode_low_cardinality_columns, dateFormat, save_to_s3_transient_zone, defined_filename_output, move_to_backup, clear_s3_directory, count_lines_in_spool, clean_column, save_chunks_to_s3_transient_zone, drop_last_rows_chunks, list_s3_files, write_chunks_to_spool, save_parts_to_s3_transient_zone
 from secrets.get_secrets import *
-from statistics.statistics import save_statistics_initial, save_statistics_final, generate_tracking_results
+from statistics.statistics import save_statistics_initial, save_statistics_final, generate_tracking_results, save_batch_summary, build_statistics_initial, build_statistics_final, save_tracking_rows
 from parameters.load_paramters_json import load_json_s3
+from parameters.transform_plan import compile_transform_plan, resolve_read_columns
+from readers.input_spool import download_to_spool, spool_source, release_spool
+from readers.arrow_csv_reader import read_csv_arrow, string_dtype
+from readers.fixed_width_reader import read_fwf_mmap
+from readers.byte_ranges import split_line_ranges, line_range_spool
+from writers.output_compression import OUTPUT_COMPRESSION_SUFFIXES
+from clients.s3_client import get_s3_client
+
+# Função que prepara um bloco lido do arquivo (ou o arquivo inteiro) para as funções operacionais
+def prepare_chunk(data, n_cols, string_storage="object"):
+    # Verificação de consistência do número de colunas
+    if data.shape[1] != n_cols:
+        print(f"Aviso: O arquivo tem {data.shape[1]} colunas, mas esperávamos {n_cols} colunas.")
+        if data.shape[1] > n_cols:
+            print("Removendo colunas extras...")
+            data = data.iloc[:, :n_cols]
+
+    # retira espaços das colunas
+    data.columns = data.columns.str.strip()
+
+    # string_storage = "arrow": colunas de texto ainda em object (engine mmap) passam para string[pyarrow]
+    if string_storage == "arrow":
+        for position in range(data.shape[1]):
+            if data.dtypes.iloc[position] == object:
+                data.isetitem(position, data.iloc[:, position].astype(string_dtype(string_storage)))
+
+    # Função que executa a função clean_column para retirar aspas e NAN ou nan de strings
+    # (coluna a coluna, no próprio DataFrame, substituindo apenas as colunas alteradas)
+    for position in range(data.shape[1]):
+        column = data.iloc[:, position]
+        cleaned = clean_column(column)
+        if cleaned is not column:
+            data.isetitem(position, cleaned)
+    return data
+
+# Função que aplica as funções operacionais (add, rename, drop, date format, hash e special functions)
+def apply_operations(data, plan):
+    """
+    Executa as funções operacionais do plano de transformação (compile_transform_plan), sem
+    interpretar novamente os parametros a cada arquivo ou bloco.
+    """
+    # Adiciona coluna(s)
+    if plan['add_columns']:
+        print("--> Aplicando Add Columns...OK")
+        data = add_columns(data, plan['add_columns'], plan['broadcast_add_columns'])
+
+    # Renommeia coluna(s)
+    if plan['rename_columns']:
+        print("--> Aplicando Rename Columns...OK")
+        data = rename_columns(data, plan['rename_columns'])
+
+    # Apaga coluna(s)
+    if plan['drop_columns']:
+        print("--> Aplicando Drop Columns...OK")
+        data = drop_columns(data, plan['drop_columns'])
+
+    # Codifica como category as colunas de baixa cardinalidade não usadas pelas funções seguintes
+    encoded_columns = encode_low_cardinality_columns(data, plan['categorical_max_unique_pct'], plan['operation_columns'])
+    if encoded_columns:
+        print(f"--> Colunas de baixa cardinalidade codificadas como category: {encoded_columns}")
+
+    # Aplica formatação de DATAS em scoluna(s)
+    if plan['date_format']:
+        print("--> Aplicando Date Format...OK")
+        data = dateFormat(data, plan['date_format'])
+        print("--> Date Format aplicado com sucesso.")
+
+    # Aplica o hash, caso seja necessário
+    # Engine ("blake2b" ou "xxhash") e formato de saída ("int64" ou "hex") definidos no arquivo de parametros
+    if plan['hash_columns']:
+        print(f"--> Aplicando Hash Columns...OK")
+        data = apply_hash(data, plan['hash_columns'], hash_engine=plan['hash_engine'], hash_key=HASH_KEY, output_format=plan['hash_output_format'])
+
+    # Aplica o special_functions, caso seja necessário
+    if plan['special_functions']:
+        print(f"Função a ser executada: {', '.join(function['definition'] for function in plan['special_functions'])}")
+        print(f"--> Aplicando funções especiais...OK")
+        data = apply_special_functions(data, plan['special_functions'], hash_engine=plan['hash_engine'], hash_key=HASH_KEY)
+
+    return data
+
+# Função que lê o arquivo de entrada (ou um intervalo dele) com a engine definida no plano
+def read_input_file(spool, plan, n_cols, skip_rows, chunk_size_rows, read_columns=None):
+    """
+    Devolve o DataFrame do arquivo ou, quando chunk_size_rows > 0, um iterador de DataFrames.
+    read_columns (resolve_read_columns) limita a leitura às colunas usadas após o drop_columns.
+    """
+    columns_list = plan['columns_list']
+    if plan['is_fixed_width']:
+        # Engine de leitura de posicionais definida no arquivo de parametros: "pandas" (padrão) ou "mmap"
+        print(f"Engine de leitura: {plan['fixed_width_engine']}")
+
+        if plan['fixed_width_engine'] == "mmap":
+            data = read_fwf_mmap(
+                spool,
+                widths=plan['widths'][:n_cols],
+                encoding=plan['encoding'],
+                skip_rows=skip_rows,
+                columns_list=columns_list,
+                chunk_size_rows=chunk_size_rows,
+                usecols=read_columns
+            )
+        else:
+            data = pd.read_fwf(
+                spool_source(spool),
+                widths=plan['widths'][:n_cols],  # Usa apenas o número correto de colunas
+                encoding=plan['encoding'],
+                skiprows=skip_rows,
+                #skiprows=skiprows_param,
+                names=columns_list if skip_rows > 0 else None,
+                #names=names_param,
+                usecols=read_columns,
+                dtype=string_dtype(plan['string_storage']),
+                chunksize=chunk_size_rows or None
+            )
+    else:
+        # Engine de leitura definida no arquivo de parametros: "pandas" (padrão) ou "arrow"
+        print(f"Engine de leitura: {plan['read_engine']}")
+
+        if plan['read_engine'] == "arrow":
+            data = read_csv_arrow(
+                spool,
+                separator=plan['separator'],
+                encoding=plan['encoding'],
+                skip_rows=skip_rows,
+                columns_list=columns_list,
+                n_cols=n_cols,
+                chunk_size_rows=chunk_size_rows,
+                usecols=read_columns
+            )
+        else:
+            data = pd.read_csv(
+                spool_source(spool),
+                sep=plan['separator'],
+                encoding=plan['encoding'],
+                dtype=string_dtype(plan['string_storage']),
+                skiprows=skip_rows,
+                header=None if skip_rows > 0 else 0,
+                names=columns_list if skip_rows > 0 else None,
+                # skiprows=skiprows_param
+                # header=header_param
+                # names=names_param
+                index_col=None,
+                usecols=read_columns if read_columns is not None else range(n_cols),  # Usa apenas o número correto de colunas
+                chunksize=chunk_size_rows or None
+            )
+
+    return data
+
+# Função executada em um processo para ler e transformar um intervalo de bytes do arquivo
+def process_file_range(range_task):
+    """
+    Lê o intervalo [start, end) do spool (precedido do prefixo nos intervalos após o primeiro),
+    aplica as funções operacionais e grava o resultado em um CSV parcial local.
+    Returns:
+        str: Caminho do arquivo parcial.
+    """
+    plan = range_task['plan']
+    n_cols = range_task['n_cols']
+    read_columns = range_task['read_columns']
+    chunk_size_rows = plan['chunk_size_rows']
+    range_spool = line_range_spool(range_task['spool'], range_task['start'], range_task['end'], range_task['prefix'])
+
+    data = read_input_file(range_spool, plan, n_cols, range_task['skip_rows'], chunk_size_rows, read_columns)
+    chunks = data if chunk_size_rows > 0 else [data]
+    # As linhas finais (trailer) são descartadas na leitura, antes de qualquer função operacional
+    if range_task['delete_last_row'] > 0:
+        chunks = drop_last_rows_chunks(chunks, range_task['delete_last_row'])
+
+    expected_cols = len(read_columns) if read_columns is not None else n_cols
+    transformed_chunks = (apply_operations(prepare_chunk(chunk, expected_cols, plan['string_storage']), plan) for chunk in chunks)
+    return write_chunks_to_spool(transformed_chunks, header=range_task['header'], output_options=plan['output_options'])
+
+# Função que divide o arquivo em intervalos de linhas e os processa em paralelo
+def process_file_ranges(spool, plan, n_cols, read_columns=None):
+    """
+    Divide o spool em intervalos de bytes alinhados às linhas e processa cada um em um processo.
+    skip_rows e o cabeçalho ficam apenas no primeiro intervalo e delete_last_row apenas no último.
+    Os intervalos seguintes recebem a primeira linha do arquivo como prefixo: o cabeçalho (lido
+    normalmente) ou, quando skip_rows > 0, uma linha pulada com skip_rows = 1.
+    Returns:
+        list: Caminhos dos CSVs parciais, na ordem original do arquivo.
+    """
+    skip_rows = plan['skip_rows']
+    delete_last_row = plan['delete_last_row']
+    header_lines = skip_rows if skip_rows > 0 else 1
+    first_line, ranges = split_line_ranges(spool, plan['parallel_ranges'], header_lines, tail_lines=delete_last_row)
+    print(f"--> Arquivo dividido em {len(ranges)} intervalo(s) de bytes: {ranges}")
+
+    range_tasks = []
+    for index, (start, end) in enumerate(ranges):
+        is_first = index == 0
+        range_tasks.append({
+            'spool': spool,
+            'start': start,
+            'end': end,
+            'prefix': b"" if is_first else first_line,
+            'skip_rows': skip_rows if is_first or skip_rows == 0 else 1,
+            'header': is_first,
+            'delete_last_row': delete_last_row if index == len(ranges) - 1 else 0,
+            'plan': plan,
+            'n_cols': n_cols,
+            'read_columns': read_columns
+        })
+
+    part_paths = []
+    errors = []
+    with ProcessPoolExecutor(max_workers=len(range_tasks)) as executor:
+        futures = [executor.submit(process_file_range, range_task) for range_task in range_tasks]
+        for future in futures:
+            try:
+                part_paths.append(future.result())
+            except Exception as e:
+                errors.append(e)
+
+    if errors:
+        for part_path in part_paths:
+            os.remove(part_path)
+        raise errors[0]
+    return part_paths
 
 # Função principal para processamento genérico
-def process_file_generic(parameters, bucket_name, path_local_landing_zone, table_name):
+def process_file_generic(parameters, bucket_name, path_local_landing_zone, table_name, tracking_rows=None, plan=None):
+    """
+    Processa um arquivo do landing-zone e grava o resultado no transient-zone.
+    Quando tracking_rows ({'start': [], 'end': []}) é informado, os registros de tracking são
+    apenas coletados nele, e a gravação em tracking/ fica a cargo de quem chamou (execução em lote).
+    plan é o plano de transformação já compilado (execução em lote); quando ausente, é compilado
+    a partir de parameters antes de qualquer leitura do arquivo.
+    """
+    spool = None
     try:
         # captura data e hora inicio processamento
         processing_start = datetime.now().strftime("%Y-%m-%d %H:%M:%S")        
@@ -21,12 +252,17 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
         file_path = parameters.get("specific_file", "")  # Novo parâmetro para arquivo específico
         print("# Key name (DYNAMODB) a ser processada: " + param_key)
 
+        # Valida e interpreta os parametros uma única vez (configurações inválidas são rejeitadas aqui)
+        if plan is None:
+            plan = compile_transform_plan(parameters, HASH_KEY)
+
         # Parâmetros fixos
         path_to_table = f"s3://{bucket_name}/landing-zone/{path_local_landing_zone}/"
         print(f"# Diretório S3: {path_to_table}")
 
         # Limpeza dos arquivos de TRACKING - s3://<bucket_name>/tracking/
-        clear_s3_directory(bucket_name, "tracking/")
+        if tracking_rows is None:
+            clear_s3_directory(bucket_name, "tracking/")
 
         # Processar apenas o arquivo específico
         str_arquivo = file_path.split("/")[-1]
@@ -36,54 +272,34 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
         path_file_full = f"s3://{bucket_name}/{file_path}"
         print(f"# Caminho completo: {path_file_full}")
 
-        # Verificando extensão de arquivo
-        extension_file = parameters.get("extension_file", "CSV")
-
-        # Coletando valores de separator_file_read para determinar se o processamento é 
-        # Se separator_file_read = ';' então Delimitado
-        # Se separator_file_read = 'NULL' então Posicional
-        separator_file_read = parameters.get("separator_file_read")
-
-        # Coletando valores de widths para arquivo posicionais
-        widths_param = parameters.get("widths", None)
-
-        if not widths_param or widths_param.strip() == "" or widths_param == "NULL":
-            widths_param = None
-
-        print(f"# Tipo de processamento: {'Arquivo Posicional' if widths_param is not None else 'Arquivo Delimitado'}")
+        # Tipo de processamento: separator_file_read = 'NULL' (e extensão dat/txt) indica Posicional
+        is_fixed_width = plan['is_fixed_width']
+        print(f"# Tipo de processamento: {'Arquivo Posicional' if is_fixed_width else 'Arquivo Delimitado'}")
 
-        # Inicializa a variável widths_str
-        widths_str = None
-
-        # Montando as colunas existentes no cadastro do Dynamodb (columns_names)
-        columns_names = parameters.get("column_names", "")
-        print(f"# Colunas: {columns_names}")
-        # Converte a string em lista apenas se não estiver vazia
-        columns_list = columns_names.split(",") if columns_names else None
-        # Determina o número correto de colunas baseado no header ou na lista de colunas
-        skip_rows = int(parameters.get("skip_rows", 0))
+        # Colunas existentes no cadastro do Dynamodb (columns_names)
+        print(f"# Colunas: {plan['columns_list']}")
+        skip_rows = plan['skip_rows']
         print(f"SkipRows utilizado: {skip_rows}")
 
+        # Quantidade de linhas por bloco no modo streaming (0 ou NULL = arquivo inteiro em memória)
+        chunk_size_rows = plan['chunk_size_rows']
+        print(f"Modo de leitura: {'Streaming em blocos de ' + str(chunk_size_rows) + ' linhas' if chunk_size_rows > 0 else 'Arquivo inteiro'}")
+
         # Função que validar a quantidade de colunas de cada arquivo
-        def get_number_of_columns(file_path, is_fixed_width=False):
+        # (posicionais e arquivos com skip_rows já têm o número de colunas definido no plano)
+        def get_number_of_columns(file_path):
+            if plan['n_cols'] is not None:
+                return plan['n_cols']
             try:
-                if skip_rows == 0:
-                    if is_fixed_width:
-                        # Para arquivos de largura fixa
-                        widths_str = json.loads(widths_param)
-                        return len(widths_str)
-                    else:
-                        # Para arquivos delimitados
-                        header_df = pd.read_csv(
-                            file_path,
-                            sep=parameters.get("separator_file_read", ";"),
-                            encoding=parameters.get("encoding_file_read", "utf-8"),
-                            nrows=1,
-                            dtype=str
-                        )
-                        return len(header_df.columns)
-                else:
-                    return len(columns_list) if columns_list else 0
+                # Para arquivos delimitados com cabeçalho
+                header_df = pd.read_csv(
+                    spool_source(spool),
+                    sep=plan['separator'],
+                    encoding=plan['encoding'],
+                    nrows=1,
+                    dtype=str
+                )
+                return len(header_df.columns)
             except Exception as e:
                 error_message = f"Erro ao determinar número de colunas: {str(e)}"
                 print(error_message)
@@ -97,81 +313,122 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
                 )
                 return 0
 
+        # Função que lê os nomes das colunas do arquivo, usados na projeção de colunas (resolve_read_columns)
+        def get_file_column_names(n_cols):
+            if not plan['drop_columns']:
+                return None
+            if skip_rows > 0:
+                return plan['columns_list'][:n_cols]
+            try:
+                # Mesmos nomes (cabeçalho, colunas sem nome e duplicadas) da leitura completa do arquivo
+                if is_fixed_width:
+                    header_df = pd.read_fwf(spool_source(spool), widths=plan['widths'][:n_cols], encoding=plan['encoding'], nrows=0, dtype=str)
+                else:
+                    header_df = pd.read_csv(spool_source(spool), sep=plan['separator'], encoding=plan['encoding'], nrows=0, dtype=str, usecols=range(n_cols))
+                return list(header_df.columns)
+            except Exception as e:
+                print(f"Aviso: cabeçalho não lido para a projeção de colunas, todas as colunas serão lidas: {e}")
+                return None
+
+        # Obtém informações do arquivo no S3 (datas para as estatísticas e tamanho para o download)
+        s3_client = get_s3_client()
+        try:
+            file_info = s3_client.head_object(Bucket=bucket_name, Key=file_path)
+        except Exception as e:
+            print(f"Erro ao obter informações do arquivo: {e}")
+            file_info = None
+
+        # Baixa o arquivo do S3 uma única vez: cabeçalho, parse e contagem de linhas usam a mesma cópia
+        # Arquivos a partir de ranged_get_min_bytes são baixados por GETs de intervalos concorrentes
+        spool = download_to_spool(
+            bucket_name,
+            file_path,
+            spool_mode=plan['input_spool_mode'],
+            object_info=file_info,
+            ranged_min_bytes=plan['ranged_get_min_bytes'],
+            part_size=plan['ranged_get_part_size'],
+            max_concurrency=plan['ranged_get_concurrency']
+        )
+
+        # Processamento paralelo por intervalos de bytes do arquivo (0 ou 1 = desativado)
+        # Disponível apenas com spool em disco e para arquivos acima de parallel_ranges_min_bytes
+        parallel_ranges = plan['parallel_ranges']
+        use_ranges = parallel_ranges > 1 and isinstance(spool, str) and os.path.getsize(spool) >= plan['parallel_ranges_min_bytes']
+        print(f"Processamento por intervalos: {'Sim, ' + str(parallel_ranges) + ' processos' if use_ranges else 'Não'}")
+
+        # No modo por intervalos a leitura aqui serve apenas para validar o arquivo (primeira linha)
+        reader_chunk_rows = 1 if use_ranges else chunk_size_rows
+
         # Verifica o tipo de arquivo a ser processado (Delimitado ou Posicional)
-        #if extension_file in {"DAT", "TXT", "dat", "txt"} and widths_param is not None:
-        if extension_file.lower() in {"dat", "txt"} and separator_file_read == "NULL":            
+        if is_fixed_width:
             print("##################################################################")
             print("Processando arquivos posicionais...")
-            n_cols = get_number_of_columns(path_file_full, is_fixed_width=True)
+            n_cols = get_number_of_columns(path_file_full)
             print(f"Numero de colunas: {n_cols}")
-            widths_str = json.loads(widths_param)
-            print(widths_str)
-
-            data = pd.read_fwf(
-                path_file_full,
-                widths=widths_str[:n_cols],  # Usa apenas o número correto de colunas
-                encoding=parameters.get("encoding_file_read", "utf-8"),
-                skiprows=skip_rows,
-                #skiprows=skiprows_param,
-                names=columns_list if skip_rows > 0 else None,
-                #names=names_param,
-                dtype=str
-            )
-            print(data)
-
-        elif extension_file.lower() in {"csv", "txt", "lis", "dat"}:
+            print(plan['widths'])
+        else:
             print("Processando arquivos delimitados...")
-            n_cols = get_number_of_columns(path_file_full, is_fixed_width=False)
+            n_cols = get_number_of_columns(path_file_full)
             print(f"Numero de colunas: {n_cols}")
 
-            data = pd.read_csv(
-                path_file_full,
-                sep=parameters.get("separator_file_read", ";"),
-                encoding=parameters.get("encoding_file_read", "utf-8"),
-                dtype=str,
-                skiprows=skip_rows,
-                header=None if skip_rows > 0 else 0,
-                names=columns_list if skip_rows > 0 else None,
-                # skiprows=skiprows_param
-                # header=header_param
-                # names=names_param
-                index_col=None,
-                usecols=range(n_cols),  # Usa apenas o número correto de colunas
-                storage_options={'anon': False}
-            )
+        # Projeção de colunas: as colunas removidas por drop_columns não são lidas
+        read_columns = resolve_read_columns(plan, get_file_column_names(n_cols))
+        expected_cols = len(read_columns) if read_columns is not None else n_cols
+        if read_columns is not None:
+            print(f"Projeção de colunas: {expected_cols} de {n_cols} colunas lidas (demais removidas por drop_columns)")
 
-        # Verificação de consistência do número de colunas
-        if data.shape[1] != n_cols:
-            print(f"Aviso: O arquivo tem {data.shape[1]} colunas, mas esperávamos {n_cols} colunas.")
-            if data.shape[1] > n_cols:
-                print("Removendo colunas extras...")
-                data = data.iloc[:, :n_cols]
+        data = read_input_file(spool, plan, n_cols, skip_rows, reader_chunk_rows, read_columns)
+        if is_fixed_width and reader_chunk_rows == 0:
+            print(data)
+
+        # Modo streaming: o reader devolve blocos de linhas, o primeiro bloco é lido agora
+        # e os demais são consumidos sob demanda durante a gravação no transient-zone
+        if reader_chunk_rows > 0:
+            reader = data
+            data = next(reader)
+            remaining_chunks = reader
+            if use_ranges:
+                reader.close()
+                remaining_chunks = iter(())
+        else:
+            remaining_chunks = iter(())
 
         if data.empty:
             print(f"# Arquivo {str_arquivo} contém apenas o cabeçalho. Pulando processamento.")
             # Enviar o arquivo original para a subpasta LANDING-RESP-TEMP
             move_to_backup(bucket_name, file_path, f"landing-resp-temp/{path_local_landing_zone}/{str_arquivo}")
-            return
+            return "SOMENTE_CABECALHO"
 
-        # retira espaços das colunas
-        data.columns = data.columns.str.strip()
-        
-        # Função que executa a função clean_column para retirar aspas e NAN ou nan de strings
-        data = data.apply(clean_column)
+        # Aplica o delete last row baseando-se na quantidade de linhas do parametro
+        # As linhas finais (trailer) são descartadas logo após a leitura, antes da limpeza e das funções operacionais:
+        # no arquivo inteiro por uma fatia das linhas lidas e no modo streaming por um buffer limitado de blocos
+        # (no modo por intervalos, pelo último intervalo)
+        delete_last_row = plan['delete_last_row']
+        if delete_last_row > 0 and not use_ranges:
+            print(f"--> Removendo as últimas {delete_last_row} linha(s) do arquivo...OK")
+            if reader_chunk_rows > 0:
+                remaining_chunks = drop_last_rows_chunks(itertools.chain([data], remaining_chunks), delete_last_row)
+                data = next(remaining_chunks)
+            else:
+                # Cópia rasa: as linhas restantes não são copiadas
+                data = data.iloc[:-delete_last_row].copy(deep=False)
+                print(f"--> {delete_last_row} linha(s) removida(s) com sucesso.")
+        elif delete_last_row == 0:
+            print("--> Nenhuma linha será removida do final do arquivo.")
+
+        # Prepara o primeiro bloco (ou o arquivo inteiro) para as funções operacionais
+        data = prepare_chunk(data, expected_cols, plan['string_storage'])
 
         # Salvar as estatísticas de processamento iniciais
         current_time = datetime.now()
 
-        # Obtém informações do arquivo no S3
-        s3_client = boto3.client('s3')
-        try:
-            file_info = s3_client.head_object(Bucket=bucket_name, Key=file_path)
+        # Datas do arquivo a partir do head_object feito antes do download
+        if file_info is not None:
             file_creation_date = file_info['LastModified'].strftime('%Y-%m-%d')
             file_creation_time = file_info['LastModified'].strftime('%H:%M:%S')
             modification_date = file_info['LastModified'].strftime('%Y-%m-%d')
             modification_time = file_info['LastModified'].strftime('%H:%M:%S')
-        except Exception as e:
-            print(f"Erro ao obter informações do arquivo: {e}")
+        else:
             file_creation_date = current_time.strftime('%Y-%m-%d')
             file_creation_time = current_time.strftime('%H:%M:%S')
             modification_date = current_time.strftime('%Y-%m-%d')
@@ -189,7 +446,7 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
             'filename_path_local': str_arquivo.split('/')[-1].split('.')[0],  # Nome do arquivo sem extensão
             'extension_file_source': str_arquivo.split('.')[-1].lower(),  # Extensão do arquivo
             'validated_files_source': 'Valido',  # Status padrão do arquivo
-            'total_lines': str(count_lines_in_s3_file(bucket_name, file_path)),
+            'total_lines': str(count_lines_in_spool(spool, file_path)),
             'file_creation_date': file_creation_date,
             'file_creation_time': file_creation_time,
             'modification_date': modification_date,
@@ -204,7 +461,7 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
         }
 
         # Salva estatisticas Iniciais
-        save_statistics_initial(
+        statistics_initial = dict(
             bucket_name=stats_data['bucket_name'],
             path_local=stats_data['path_local'],
             filename_path_local=f"s3://{bucket_name}/{stats_data['path_local']}",
@@ -224,85 +481,59 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
             fecha_ref=stats_data['fecha_ref'],
             table_name=stats_data['table_name']
         )
+        if tracking_rows is None:
+            save_statistics_initial(**statistics_initial)
+        else:
+            tracking_rows['start'].append(build_statistics_initial(**statistics_initial))
 
         # Aplicando funções operacionais
         print('### Iniciando configuração das funções operacionais ###')
         pd.set_option('display.max_columns', None)
 
-        # Adiciona coluna(s)
-        if "add_columns" in parameters and parameters["add_columns"] and parameters["add_columns"] !="NULL":
-            print("--> Aplicando Add Columns...OK")
-            data = add_columns(data, parameters["add_columns"])
-
-        # Renommeia coluna(s)
-        if "rename_columns" in parameters and parameters["rename_columns"] and parameters["rename_columns"] !="NULL":
-            print("--> Aplicando Rename Columns...OK")
-            rename_mapping = dict(pair.split(":") for pair in parameters["rename_columns"].split(","))
-            data = rename_columns(data, rename_mapping)
-
-        # Apaga coluna(s)
-        if "drop_columns" in parameters and parameters["drop_columns"] and parameters["drop_columns"] !="NULL":
-            print("--> Aplicando Drop Columns...OK")
-            drop_columns_list = parameters["drop_columns"].split(",")
-            data = drop_columns(data, drop_columns_list)
-
-        # Aplica formatação de DATAS em scoluna(s)
-        if "date_format" in parameters and parameters["date_format"] and parameters["date_format"] != "NULL":
-            print("--> Aplicando Date Format...OK")
-            data = dateFormat(data, parameters["date_format"])
-            print("--> Date Format aplicado com sucesso.")
-
-        # Aplica o hash, caso seja necessário
-        if "hash_columns" in parameters and parameters["hash_columns"] and parameters["hash_columns"] !="NULL":
-            print(f"--> Aplicando Hash Columns...OK")
-            data = apply_hash(data, parameters["hash_columns"])
-
-        # Aplica o special_functions, caso seja necessário
-        special_functions = parameters["special_functions"]
-        print(f"Função a ser executada: {special_functions}")
-   
-        if "special_functions" in parameters and parameters["special_functions"] and parameters["special_functions"] !="NULL":
-            print(f"--> Aplicando funções especiais...OK")
-            data = apply_special_functions(data, parameters["special_functions"])            
-
-        # Aplica o delete last row baseando-se na quantidade de linhas do parametro
-        delete_last_row = int(parameters.get("delete_last_row", 0))
-        if delete_last_row > 0:
-            print(f"--> Removendo as últimas {delete_last_row} linha(s) do arquivo...OK")
-            data = data.iloc[:-delete_last_row]
-            print(f"--> {delete_last_row} linha(s) removida(s) com sucesso.")
+        if use_ranges:
+            # As funções são aplicadas por intervalo do arquivo, em processos paralelos, durante a gravação
+            print(f"--> Funções operacionais serão aplicadas por intervalo do arquivo ({parallel_ranges} processos)")
+            if delete_last_row > 0:
+                print(f"--> Removendo as últimas {delete_last_row} linha(s) do arquivo (último intervalo)...OK")
+        elif chunk_size_rows > 0:
+            # No modo streaming as funções são aplicadas bloco a bloco durante a gravação
+            transformed_chunks = (apply_operations(chunk, plan) for chunk in itertools.chain(
+                [data], (prepare_chunk(chunk, expected_cols, plan['string_storage']) for chunk in remaining_chunks)))
         else:
-            print("--> Nenhuma linha será removida do final do arquivo.")
+            data = apply_operations(data, plan)
 
         print('### Finalizando configuração das funções operacionais ###')
 
         # Salvar o arquivo processado no S3
-        regex_pattern = parameters.get("regex_pattern", "NULL")
-        filename_output = parameters.get("filename_output", "NULL")
-        path_s3 = parameters.get("path_s3", "PATH_ERROR")
-        load_regex_filename_ouput = [
-                {
-                    "regex_pattern": regex_pattern,
-                    "filename_output": filename_output
-                }
-            ]
-        data_tuples = [(item["regex_pattern"], item["filename_output"]) for item in load_regex_filename_ouput]
-        print(f"As tuplas são: {data_tuples}")
-        extension_file_target = parameters.get("extension_file_target", "csv")
+        # Regex e nome de saída já compilados no plano
+        path_s3 = plan['path_s3']
+        data_tuples = plan['filename_patterns']
+        print(f"As tuplas são: {[(regex.pattern, filename_output) for regex, filename_output in data_tuples]}")
+        extension_file_target = plan['extension_file_target']
         nome_saida = defined_filename_output(str_arquivo, data_tuples)
         print(f"# Nome arquivo de entrada: {str_arquivo}")
-        print(f"# Nome do arquivo de saída: {nome_saida}.{extension_file_target.lower()}\n")
+        # CSV comprimido (output_compression): a extensão da compressão é adicionada ao nome (ex.: .csv.gz)
+        compression_suffix = OUTPUT_COMPRESSION_SUFFIXES.get(plan['output_options']['compression'], "")
+        print(f"# Nome do arquivo de saída: {nome_saida}.{extension_file_target.lower()}{compression_suffix}\n")
 
         # Verifica se o arquivos de saida está com nomenclatura correta (errado: Regex_{match}_contem_problemas_csv)
         if nome_saida.startswith("Regex"):
             print("ATENÇÃO: Favor verificar o REGEX no DYNAMODB")
+            status = "REGEX_INVALIDO"
             # Enviar o arquivo original para a subpasta LANDING-RESP-TEMP
             move_to_backup(bucket_name, file_path, f"landing-resp-temp/{path_local_landing_zone}/{str_arquivo}")
         else:
-            filename_s3 = f"transient-zone/{path_s3}/{nome_saida}.{extension_file_target.lower()}"
-            save_to_s3_transient_zone(bucket_name, filename_s3, data)
+            filename_s3 = f"transient-zone/{path_s3}/{nome_saida}.{extension_file_target.lower()}{compression_suffix}"
+            if use_ranges:
+                part_paths = process_file_ranges(spool, plan, n_cols, read_columns)
+                save_parts_to_s3_transient_zone(bucket_name, filename_s3, part_paths, plan['upload_part_size'], plan['upload_concurrency'], plan['output_options'])
+            elif chunk_size_rows > 0:
+                save_chunks_to_s3_transient_zone(bucket_name, filename_s3, transformed_chunks, plan['upload_part_size'], plan['upload_concurrency'], plan['output_options'])
+            else:
+                save_to_s3_transient_zone(bucket_name, filename_s3, data, plan['upload_part_size'], plan['upload_concurrency'], plan['output_options'])
             # Movendo arquivo para backup após processamento
             move_to_backup(bucket_name, file_path, f"landing-zone-archive/{path_local_landing_zone}/{str_arquivo}")
+            status = "PROCESSADO"
 
         # Salvar as estatísticas de processamento finais
         path_local_target = f"landing-zone/{path_local_landing_zone}"
@@ -311,10 +542,15 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
         filename_path_local_target = '/'.join(filename_path_local)
         filename_s3_target = path_file_full.split("/")[-1]
         processing_end = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        save_statistics_final(bucket_name, path_local_target, filename_path_local_target, filename_s3_target, extension_file_target, str(processing_end), str(processing_start))
+        if tracking_rows is None:
+            save_statistics_final(bucket_name, path_local_target, filename_path_local_target, filename_s3_target, extension_file_target, str(processing_end), str(processing_start))
 
-        # Após salvar as estatísticas finais, gerar o arquivo de resultados
-        generate_tracking_results(bucket_name)
+            # Após salvar as estatísticas finais, gerar o arquivo de resultados
+            generate_tracking_results(bucket_name)
+        else:
+            tracking_rows['end'].append(build_statistics_final(path_local_target, filename_path_local_target, filename_s3_target, extension_file_target, str(processing_end), str(processing_start)))
+
+        return status
 
     except Exception as e:
         error_message = f"Erro ao processar o arquivo {file_path}: {str(e)}"
@@ -328,6 +564,86 @@ def process_file_generic(parameters, bucket_name, path_local_landing_zone, table
             additional_info=str(e)
         )
         raise
+    finally:
+        # Remove a cópia local do arquivo de entrada
+        release_spool(spool)
+
+# Função executada por arquivo em uma execução em lote (no processo principal ou em um worker)
+def process_file_worker(parameters, bucket_name, path_local_landing_zone, table_name, plan=None):
+    """
+    Processa um arquivo coletando os registros de tracking em vez de gravá-los no S3.
+    Cada worker usa os seus próprios clients boto3 (get_s3_client é por processo).
+    Returns:
+        tuple: (resumo do arquivo, registros de tracking {'start': [...], 'end': [...]})
+    """
+    tracking_rows = {'start': [], 'end': []}
+    started = time.perf_counter()
+    try:
+        status = process_file_generic(parameters, bucket_name, path_local_landing_zone, table_name, tracking_rows=tracking_rows, plan=plan)
+        error = ""
+    except Exception as e:
+        # O erro já foi notificado via SNS em process_file_generic
+        status = "ERRO"
+        error = f"{type(e).__name__}: {e}"
+    result = {
+        'file_path': parameters['specific_file'],
+        'status': status,
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'error': error
+    }
+    return result, tracking_rows
+
+# Função que processa em lote todos os arquivos de um diretório do landing-zone
+def process_batch(parameters, bucket_name, path_local_landing_zone, table_name, workers=1):
+    """
+    Processa, em uma única execução, todos os arquivos de landing-zone/<path_local>/.
+    Parâmetros, secrets e clients são carregados uma única vez e reaproveitados, e o plano de
+    transformação é compilado (e validado) antes de qualquer arquivo ser lido.
+    Com workers > 1 os arquivos são processados em paralelo por um pool de processos.
+    Os registros de tracking de todos os arquivos são reunidos no processo principal e
+    gravados uma única vez, sem concorrência em tracking_start.csv e tracking_end.csv.
+    Uma falha em um arquivo não interrompe os demais.
+    Returns:
+        list: Resumo por arquivo (file_path, status, elapsed_seconds, error).
+    """
+    plan = compile_transform_plan(parameters, HASH_KEY)
+
+    prefix = f"landing-zone/{path_local_landing_zone}/"
+    file_keys = list_s3_files(bucket_name, prefix)
+    tasks = [(dict(parameters, specific_file=file_key), bucket_name, path_local_landing_zone, table_name, plan) for file_key in file_keys]
+
+    results = {}
+    tracking_rows = {'start': [], 'end': []}
+
+    def collect(result, file_tracking_rows):
+        results[result['file_path']] = result
+        tracking_rows['start'].extend(file_tracking_rows['start'])
+        tracking_rows['end'].extend(file_tracking_rows['end'])
+        print(f"### [{len(results)}/{len(tasks)}] {result['file_path']}: {result['status']} ({result['elapsed_seconds']}s) ###")
+
+    if workers > 1 and len(tasks) > 1:
+        print(f"# Processando {len(tasks)} arquivo(s) com {workers} worker(s)")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_file_worker, *task): task[0]['specific_file'] for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    collect(*future.result())
+                except Exception as e:
+                    # Falha do próprio worker (ex.: processo encerrado por falta de memória)
+                    collect({'file_path': futures[future], 'status': 'ERRO', 'elapsed_seconds': 0, 'error': f"{type(e).__name__}: {e}"}, {'start': [], 'end': []})
+    else:
+        for task in tasks:
+            collect(*process_file_worker(*task))
+
+    # Grava o tracking de todos os arquivos de uma só vez e gera o arquivo de resultados
+    if tracking_rows['start'] or tracking_rows['end']:
+        clear_s3_directory(bucket_name, "tracking/")
+        save_tracking_rows(bucket_name, tracking_rows)
+        generate_tracking_results(bucket_name)
+
+    summary = [results[file_key] for file_key in file_keys]
+    save_batch_summary(bucket_name, summary)
+    return summary
 
 # Bloco principal
 if __name__ == "__main__":
@@ -337,12 +653,16 @@ if __name__ == "__main__":
 
     # Adicionar argumentos esperados
     parser.add_argument('--bucket_name', type=str, required=True)
-    parser.add_argument('--file_path', type=str, required=True)
+    parser.add_argument('--file_path', type=str, required=False)
+    parser.add_argument('--batch', action='store_true', help='Processa todos os arquivos de landing-zone/<path_local>/')
+    parser.add_argument('--workers', type=int, default=1, help='Quantidade de processos paralelos no modo --batch')
     parser.add_argument('--path_local', type=str, required=True)
     parser.add_argument('--table_name', type=str, required=True)
 
     # Analisar os argumentos
     args = parser.parse_args()
+    if not args.batch and not args.file_path:
+        parser.error("Informe --file_path ou --batch")
 
     # Acessar os valores dos argumentos
     bucket_name = args.bucket_name
@@ -353,6 +673,8 @@ if __name__ == "__main__":
     # Exibir os valores dos argumentos
     print(f"bucket_name: {bucket_name}")
     print(f"file_path: {file_path}")
+    print(f"batch: {args.batch}")
+    print(f"workers: {args.workers}")
     print(f"path_local: {path_local_landing_zone}")
     print(f"table_name: {table_name}")
 
@@ -373,7 +695,10 @@ if __name__ == "__main__":
     try:
         # Carrega o JSON com parâmetros do S3
         parameters = load_json_s3(bucket_name, s3_key)
-        if parameters:
+        if parameters and args.batch:
+            # Processa todos os arquivos do diretório com os mesmos parâmetros e clients
+            process_batch(parameters, bucket_name, path_local_landing_zone, table_name, workers=args.workers)
+        elif parameters:
             # Adiciona o arquivo específico aos parâmetros
             parameters['specific_file'] = file_path
             process_file_generic(parameters, bucket_name, path_local_landing_zone, table_name)
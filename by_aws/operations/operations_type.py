@@ -1,11 +1,36 @@
 import os
-import boto3
+import itertools
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_string_dtype
 from datetime import datetime
-from io import StringIO
 from pathlib import Path
 import re
+import tempfile
 from messaging.publish_message import send_mail_exception
+from readers.input_spool import open_spool
+from readers.compression import detect_compression, iter_decompressed_chunks, strip_compression_extension
+from clients.s3_client import get_s3_client
+from writers.csv_writer import iter_csv_bytes
+from writers.s3_multipart_upload import upload_stream_to_s3, iter_file_bytes, MULTIPART_PART_SIZE, MULTIPART_CONCURRENCY
+from writers.parquet_writer import iter_parquet_bytes, write_arrow_part, iter_arrow_parts
+from writers.output_compression import iter_compressed_bytes, output_upload_args
+
+# Tamanho dos chunks usados na contagem de linhas
+COUNT_LINES_CHUNK_SIZE = 1024 * 1024  # 1MB por chunk
+
+# Percentual máximo de valores distintos (na amostra) para uma coluna ser codificada como category
+CATEGORICAL_MAX_UNIQUE_PCT = 5
+
+# Quantidade de linhas da amostra usada para estimar a cardinalidade das colunas
+CATEGORICAL_SAMPLE_ROWS = 10000
+
+# Espaços removidos pelo str.strip() do Python, explícitos para que as engines pandas e Arrow
+# (regex RE2, onde \s é apenas ASCII) tratem os mesmos caracteres
+STRIP_WHITESPACE_CHARS = "".join(chr(code) for code in range(0x3001) if chr(code).isspace())
+
+# Texto que precisa de limpeza em clean_column: espaço nas pontas ou aspas
+DIRTY_TEXT_PATTERN = f"^[{STRIP_WHITESPACE_CHARS}]|[{STRIP_WHITESPACE_CHARS}]$|[\"']"
 
 # Função que executa a eliminação de colunas
 def drop_columns(data, columns):
@@ -15,21 +40,77 @@ def drop_columns(data, columns):
 def rename_columns(data, columns_mapping):
     return data.rename(columns=columns_mapping)
 
-# Função que executa a adição de colunas
-def add_columns(data, add_columns_string):
-    """
-    Adiciona colunas ao DataFrame com base em uma string no formato "coluna1:valor1,coluna2:valor2".
-    """
+# Função que converte o parametro rename_columns ("atual1:nova1,atual2:nova2") em um dicionário {atual: nova}
+def parse_rename_columns(rename_columns_string):
+    columns_mapping = {}
+    for pair in rename_columns_string.split(","):
+        parts = pair.split(":")
+        if len(parts) != 2:
+            raise ValueError(f"Par inválido '{pair}' (formato coluna_atual:coluna_nova)")
+        columns_mapping[parts[0]] = parts[1]
+    return columns_mapping
+
+# Função que converte o parametro add_columns ("coluna1:valor1,coluna2") em um dicionário {coluna: valor}
+def parse_add_columns(add_columns_string):
     #columns = dict(pair.split(":") for pair in add_columns_string.split(","))
     columns = {}
     for pair in add_columns_string.split(","):
         col, default = pair.split(":") if ":" in pair else (pair, "")
         columns[col] = default
+    return columns
+
+# Função que executa a adição de colunas
+def add_columns(data, add_columns_string, broadcast_columns=()):
+    """
+    Adiciona colunas ao DataFrame com base em uma string no formato "coluna1:valor1,coluna2:valor2"
+    ou no dicionário já convertido por parse_add_columns.
+    As colunas em broadcast_columns guardam o valor uma única vez (category com um único valor e
+    1 byte por linha), em vez de um objeto por linha.
+    """
+    columns = parse_add_columns(add_columns_string) if isinstance(add_columns_string, str) else add_columns_string
 
     for col, default in columns.items():
-        data[col] = default
+        if col in broadcast_columns:
+            data[col] = pd.Categorical.from_codes(np.zeros(len(data), dtype=np.int8), categories=[default])
+        else:
+            data[col] = default
     return data
 
+# Função que codifica como category as colunas de texto com poucos valores distintos
+def encode_low_cardinality_columns(data, max_unique_pct, exclude_columns=()):
+    """
+    A cardinalidade é estimada nas primeiras CATEGORICAL_SAMPLE_ROWS linhas: colunas com até
+    max_unique_pct% de valores distintos na amostra (códigos de país, status, flags) passam a
+    guardar cada valor uma única vez e um código inteiro por linha. O CSV gerado não muda.
+    Returns:
+        list: Nomes das colunas codificadas.
+    """
+    encoded = []
+    if max_unique_pct <= 0 or data.empty:
+        return encoded
+    for position in range(data.shape[1]):
+        name = data.columns[position]
+        column = data.iloc[:, position]
+        if name in exclude_columns or not is_string_dtype(column.dtype):
+            continue
+        sample = column.iloc[:CATEGORICAL_SAMPLE_ROWS]
+        if sample.nunique(dropna=False) * 100 > len(sample) * max_unique_pct:
+            continue
+        data.isetitem(position, column.astype("category"))
+        encoded.append(name)
+    return encoded
+
+# Função que converte o parametro date_format em uma lista de (coluna, formato_entrada, formato_saida)
+def parse_date_format(date_format_params):
+    date_formats = []
+    for column_config in date_format_params.split(','):
+        # Remove espaços em branco e separa os parâmetros
+        parts = [x.strip() for x in column_config.split(':')]
+        if len(parts) != 3:
+            raise ValueError(f"Configuração inválida '{column_config}' (formato coluna:formato_entrada:formato_saida)")
+        date_formats.append(tuple(parts))
+    return date_formats
+
 # Função para formatar a data
 def dateFormat(df, date_format_params):
     """
@@ -37,16 +118,15 @@ def dateFormat(df, date_format_params):
     Args:
         df: DataFrame pandas
         date_format_params: String no formato "coluna:formato_entrada:formato_saida[,coluna:formato_entrada:formato_saida]"
+            ou a lista já convertida por parse_date_format
     Returns:
         DataFrame com as datas convertidas
     """
     try:
         # Separa múltiplas colunas se houver
-        columns_to_process = date_format_params.split(',')
+        columns_to_process = parse_date_format(date_format_params) if isinstance(date_format_params, str) else date_format_params
 
-        for column_config in columns_to_process:
-            # Remove espaços em branco e separa os parâmetros
-            column_name, input_format, output_format = [x.strip() for x in column_config.split(':')]
+        for column_name, input_format, output_format in columns_to_process:
 
             print(f"--> Convertendo formato de data para coluna: {column_name}")
             print(f"    Formato de entrada: {input_format}")
@@ -57,21 +137,19 @@ def dateFormat(df, date_format_params):
                 print(f"    Aviso: Coluna {column_name} não encontrada no DataFrame")
                 continue
 
-            # Cria uma nova lista para armazenar as datas convertidas
-            converted_dates = []
-
-            # Processa cada valor na coluna
-            for date_value in df[column_name]:
-                try:
-                    if pd.isna(date_value) or str(date_value).strip() == '':
-                        converted_dates.append('')
-                    else:
-                        # Tenta converter a data usando o formato especificado
-                        parsed_date = datetime.strptime(str(date_value).strip(), input_format)
-                        converted_dates.append(parsed_date.strftime(output_format))
-                except Exception as e:
-                    print(f"    Aviso: Erro ao converter valor '{date_value}' na coluna {column_name}: {str(e)}")
-                    converted_dates.append('')
+            # Converte apenas os valores distintos da coluna e mapeia o resultado de volta às linhas
+            codes, unique_values = pd.factorize(df[column_name])
+            converted_unique, invalid_positions, error_example = _convert_unique_dates(unique_values, input_format, output_format)
+
+            # Valores nulos (código -1) viram string vazia: último elemento da tabela de conversão
+            converted_unique.append('')
+            converted_dates = np.asarray(converted_unique, dtype=object)[codes]
+
+            # Valores inválidos são reportados uma única vez por coluna
+            if invalid_positions:
+                invalid_rows = int(np.isin(codes, invalid_positions).sum())
+                examples = ", ".join(f"'{unique_values[position]}'" for position in invalid_positions[:5])
+                print(f"    Aviso: {invalid_rows} valor(es) inválido(s) ({len(invalid_positions)} distinto(s)) na coluna {column_name}, convertidos para vazio. Ex.: {examples} - {error_example}")
 
             # Substitui a coluna original com os valores convertidos
             df[column_name] = converted_dates
@@ -91,14 +169,67 @@ def dateFormat(df, date_format_params):
         )
         raise
 
+# Função que converte o formato dos valores distintos de uma coluna de datas
+def _convert_unique_dates(unique_values, input_format, output_format):
+    """
+    Conversão vetorizada (pd.to_datetime com o formato exato) e, para os valores que ela não
+    converte (formatos não suportados pelo pandas ou datas fora do intervalo do Timestamp,
+    ex.: 99991231), datetime.strptime valor a valor.
+    Returns:
+        tuple: (valores convertidos, posições dos valores inválidos, mensagem de erro de exemplo)
+    """
+    values = [str(value).strip() for value in unique_values]
+    try:
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), format=input_format, errors="coerce")
+        converted = parsed.dt.strftime(output_format).tolist()
+    except (ValueError, TypeError):
+        converted = [None] * len(values)
+
+    invalid_positions = []
+    error_example = ""
+    for position, value in enumerate(values):
+        if isinstance(converted[position], str):
+            continue
+        if value == '':
+            converted[position] = ''
+            continue
+        try:
+            converted[position] = datetime.strptime(value, input_format).strftime(output_format)
+        except Exception as e:
+            converted[position] = ''
+            invalid_positions.append(position)
+            error_example = error_example or str(e)
+    return converted, invalid_positions, error_example
+
+# Função que gera o arquivo de saída em blocos de bytes no formato definido (CSV ou Parquet)
+def iter_output_bytes(chunks, output_options=None, header=True):
+    """
+    output_options (compile_transform_plan): file_format "parquet" gera um único Parquet com
+    row groups de parquet_row_group_rows linhas; os demais valores geram o CSV de saída (sep=";"),
+    comprimido em uma thread própria quando compression é "gzip" ou "zstd".
+    """
+    if output_options and output_options['file_format'] == "parquet":
+        return iter_parquet_bytes(chunks, output_options['parquet_row_group_rows'], output_options['parquet_compression'])
+    return _compress_output(iter_csv_bytes(chunks, header=header), output_options)
+
+# Função que comprime os bytes do CSV de saída, quando definido em output_options
+def _compress_output(byte_chunks, output_options):
+    compression = (output_options or {}).get('compression')
+    return iter_compressed_bytes(byte_chunks, compression) if compression else byte_chunks
+
+# Função que define os metadados do objeto de saída (ContentType do CSV comprimido)
+def _output_upload_args(output_options):
+    return output_upload_args((output_options or {}).get('compression'))
+
 # Função para salvar o arquivo processado no S3
-def save_to_s3_transient_zone(bucket_name, key, data):
-    s3 = boto3.client("s3")
+def save_to_s3_transient_zone(bucket_name, key, data, part_size=MULTIPART_PART_SIZE, max_concurrency=MULTIPART_CONCURRENCY, output_options=None):
+    """
+    O arquivo (CSV ou Parquet) é gerado em blocos de bytes enviados ao S3 em partes à medida que
+    são gerados (upload_stream_to_s3), sem montar o arquivo inteiro em um texto e uma cópia em bytes.
+    """
+    s3 = get_s3_client()
     try:
-        buffer = StringIO()
-        data.to_csv(buffer, index=False, sep=";")
-        buffer.seek(0)
-        s3.put_object(Bucket=bucket_name, Key=key, Body=buffer.getvalue())
+        upload_stream_to_s3(s3, bucket_name, key, iter_output_bytes([data], output_options), part_size, max_concurrency, _output_upload_args(output_options))
         print(f"Arquivo salvo com sucesso no S3: s3://{bucket_name}/{key}")
     except Exception as e:
         error_message = f"Erro ao salvar arquivo no S3: {e}"
@@ -110,6 +241,131 @@ def save_to_s3_transient_zone(bucket_name, key, data):
             additional_info=error_message
         )
 
+# Função para salvar no S3 o arquivo processado em blocos (modo streaming)
+def save_chunks_to_s3_transient_zone(bucket_name, key, chunks, part_size=MULTIPART_PART_SIZE, max_concurrency=MULTIPART_CONCURRENCY, output_options=None):
+    """
+    Envia os blocos já transformados direto ao S3 em partes, escrevendo o cabeçalho apenas
+    no primeiro bloco (no Parquet, cada row group é gravado assim que completo): a transformação
+    dos blocos seguintes acontece enquanto as partes anteriores são enviadas.
+    O conteúdo gerado é idêntico ao de save_to_s3_transient_zone para o arquivo inteiro.
+    Erros nas transformações dos blocos abortam o upload e são propagados para o chamador.
+    """
+    transform_errors = []
+
+    # Registra os erros da transformação, para diferenciá-los dos erros de envio
+    def guarded_chunks():
+        try:
+            yield from chunks
+        except Exception as e:
+            transform_errors.append(e)
+            raise
+
+    s3 = get_s3_client()
+    try:
+        upload_stream_to_s3(s3, bucket_name, key, iter_output_bytes(guarded_chunks(), output_options), part_size, max_concurrency, _output_upload_args(output_options))
+        print(f"Arquivo salvo com sucesso no S3: s3://{bucket_name}/{key}")
+    except Exception as e:
+        if transform_errors:
+            raise
+        error_message = f"Erro ao salvar arquivo no S3: {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=key,
+            process_name="save_chunks_to_s3_transient_zone",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )
+
+# Função que grava blocos de um DataFrame em um arquivo CSV temporário local
+def write_chunks_to_spool(chunks, header=True, output_options=None):
+    """
+    Grava os blocos no formato de saída (sep=";"), com cabeçalho apenas no primeiro bloco
+    quando header=True. Com saída Parquet, os blocos são gravados em Arrow IPC (write_arrow_part).
+    Returns: caminho do arquivo gerado.
+    """
+    if output_options and output_options['file_format'] == "parquet":
+        return write_arrow_part(chunks)
+    spool = tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False)
+    try:
+        with spool:
+            for block in iter_csv_bytes(chunks, header=header):
+                spool.write(block)
+    except Exception:
+        os.remove(spool.name)
+        raise
+    return spool.name
+
+# Função para salvar no S3 arquivos parciais concatenados na ordem recebida
+def save_parts_to_s3_transient_zone(bucket_name, key, part_paths, part_size=MULTIPART_PART_SIZE, max_concurrency=MULTIPART_CONCURRENCY, output_options=None):
+    """
+    Os arquivos parciais são lidos em sequência e enviados em partes, sem serem copiados
+    antes para um único arquivo local. Com saída Parquet, as partes Arrow IPC são reunidas
+    em um único Parquet durante o envio.
+    """
+    s3 = get_s3_client()
+    if output_options and output_options['file_format'] == "parquet":
+        byte_chunks = iter_output_bytes(iter_arrow_parts(part_paths), output_options)
+    else:
+        byte_chunks = _compress_output(iter_file_bytes(part_paths), output_options)
+    try:
+        upload_stream_to_s3(s3, bucket_name, key, byte_chunks, part_size, max_concurrency, _output_upload_args(output_options))
+        print(f"Arquivo salvo com sucesso no S3: s3://{bucket_name}/{key}")
+    except Exception as e:
+        error_message = f"Erro ao salvar arquivo no S3: {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=key,
+            process_name="save_parts_to_s3_transient_zone",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )
+    finally:
+        for path in set(part_paths):
+            if os.path.exists(path):
+                os.remove(path)
+
+# Função que remove as últimas linhas de um arquivo lido em blocos
+def drop_last_rows_chunks(chunks, n_rows):
+    """
+    Retém apenas os blocos necessários para cobrir as últimas n_rows linhas e as descarta
+    ao final, equivalente a data.iloc[:-n_rows] aplicado ao arquivo inteiro.
+    Os blocos são devolvidos inteiros (ou fatiados ao final), sem concatenação: o buffer fica
+    limitado a um bloco mais os blocos seguintes que somam menos de n_rows linhas.
+    Sempre devolve ao menos um bloco (possivelmente vazio) para preservar o cabeçalho.
+    """
+    pending = []
+    # Linhas dos blocos retidos após o primeiro (cobrem as linhas finais do arquivo)
+    trailing_rows = 0
+    empty_chunk = None
+    emitted = False
+    for chunk in chunks:
+        if empty_chunk is None:
+            empty_chunk = chunk.iloc[:0].copy(deep=False)
+        if pending:
+            trailing_rows += len(chunk)
+        pending.append(chunk)
+        # O primeiro bloco retido é liberado quando os seguintes já contêm as n_rows linhas finais
+        while len(pending) > 1 and trailing_rows >= n_rows:
+            yield pending.pop(0)
+            emitted = True
+            trailing_rows -= len(pending[0])
+
+    # Fim do arquivo: remove as n_rows linhas finais dos blocos retidos
+    remaining_rows = n_rows
+    while pending and remaining_rows > 0:
+        last_chunk = pending.pop()
+        if len(last_chunk) > remaining_rows:
+            # Cópia rasa: a fatia é um bloco próprio (recebe novas colunas) sem copiar os dados
+            pending.append(last_chunk.iloc[:len(last_chunk) - remaining_rows].copy(deep=False))
+            remaining_rows = 0
+        else:
+            remaining_rows -= len(last_chunk)
+    for chunk in pending:
+        yield chunk
+        emitted = True
+    if not emitted and empty_chunk is not None:
+        yield empty_chunk
+
 # Função que renomeia arquivos de saida pelo REGEX
 def defined_filename_output(nome_arquivo, regex_padroes):
     """
@@ -122,11 +378,13 @@ def defined_filename_output(nome_arquivo, regex_padroes):
     """
 
     # Remove caminho e extensão, normaliza espaços
-    base = os.path.splitext(os.path.basename(nome_arquivo.strip()))[0]
+    # (arquivos comprimidos: remove também a extensão de compressão, ex.: .csv.gz)
+    base = os.path.splitext(strip_compression_extension(os.path.basename(nome_arquivo.strip())))[0]
     print(f"Arquivo base: {base}")
 
     for regex, filename_output in regex_padroes:
-        print(f"Meu regex: {regex}")
+        # regex pode ser texto ou um padrão já compilado (re.compile)
+        print(f"Meu regex: {getattr(regex, 'pattern', regex)}")
         print(f"Meu Arquivo de saida: {filename_output}")
         if re.fullmatch(regex, base):
             # preserve o nome inteiro
@@ -144,7 +402,7 @@ def defined_filename_output(nome_arquivo, regex_padroes):
 
 # Função para mover arquivo no S3
 def move_to_backup(bucket_name, source_key, backup_key):
-    s3 = boto3.client("s3")
+    s3 = get_s3_client()
     try:
         s3.copy_object(Bucket=bucket_name, CopySource={'Bucket': bucket_name, 'Key': source_key}, Key=backup_key)
         print(f"Arquivo movido para backup: s3://{bucket_name}/{backup_key}")
@@ -163,10 +421,10 @@ def move_to_backup(bucket_name, source_key, backup_key):
 # Função para limpar diretório tracking no S3
 def clear_s3_directory(bucket, prefix):
     try:
-        s3 = boto3.client("s3")
-        response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-        for obj in response.get('Contents', []):
-            s3.delete_object(Bucket=bucket, Key=obj['Key'])
+        s3 = get_s3_client()
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                s3.delete_object(Bucket=bucket, Key=obj['Key'])
         print(f"# Limpeza completa do diretório: s3://{bucket}/{prefix}...OK")
     except Exception as e:
         error_message = f"Erro ao limpar diretório S3: {e}"
@@ -178,42 +436,42 @@ def clear_s3_directory(bucket, prefix):
             additional_info=error_message
         )
 
+# Função para listar (com paginação) os arquivos de um diretório no S3
+def list_s3_files(bucket, prefix):
+    """
+    Lista os arquivos imediatamente abaixo do prefixo informado, ignorando subdiretórios.
+    Args:
+        bucket (str): Nome do bucket.
+        prefix (str): Diretório no formato "landing-zone/<path_local>/".
+    Returns:
+        list: Chaves dos arquivos encontrados, em ordem.
+    """
+    s3 = get_s3_client()
+    file_keys = []
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix, Delimiter='/'):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('/'):
+                file_keys.append(obj['Key'])
+    print(f"# {len(file_keys)} arquivo(s) encontrado(s) em s3://{bucket}/{prefix}")
+    return file_keys
+
 # Função para contar linhas em um arquivo no S3
 def count_lines_in_s3_file(bucket, file_key):
     try:
-        s3_client = boto3.client('s3')
+        s3_client = get_s3_client()
         response = s3_client.get_object(Bucket=bucket, Key=file_key)
 
         # Lê o conteúdo do arquivo em chunks para evitar problemas com arquivos grandes
-        chunk_size = 1024 * 1024  # 1MB por chunk
-        line_count = 0
-
-        # Inicializa o buffer para conteúdo residual entre chunks
-        remainder = ""
-
-        # Processa o arquivo em chunks
-        for chunk in response['Body'].iter_chunks(chunk_size=chunk_size):
-            # Tenta descobrir em UTF-8, Windows-1252 ou Latin-1
-            try:
-                content = chunk.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    content = chunk.decode('windows-1252')
-                except UnicodeDecodeError:
-                    content = chunk.decode('ISO-8859-1', errors='replace')
-            
-            content = remainder + content
-            lines = content.split('\n')
-
-            # Guarda a última linha parcial para o próximo chunk
-            remainder = lines[-1]
-
-            # Conta as linhas completas neste chunk
-            line_count += len(lines) - 1
-
-        # Adiciona a última linha se não estiver vazia
-        if remainder:
-            line_count += 1
+        chunks = response['Body'].iter_chunks(chunk_size=COUNT_LINES_CHUNK_SIZE)
+
+        # Arquivos comprimidos: as linhas são contadas sobre o conteúdo descomprimido em streaming
+        first_chunk = next(chunks, b"")
+        chunks = itertools.chain([first_chunk], chunks)
+        compression = detect_compression(file_key, first_chunk)
+        if compression is not None:
+            chunks = iter_decompressed_chunks(chunks, compression)
+
+        line_count = count_lines_in_chunks(chunks)
 
         print(f"Total de linhas no arquivo {file_key}: {line_count}")
         return line_count
@@ -228,14 +486,86 @@ def count_lines_in_s3_file(bucket, file_key):
             additional_info=error_message
         )
         return None
-    
+
+# Função para contar linhas de um arquivo já baixado para o spool (sem nova leitura no S3)
+def count_lines_in_spool(spool, file_key):
+    try:
+        if isinstance(spool, (bytes, bytearray)):
+            # Spool em memória: contagem direta sobre os bytes, sem cópia
+            line_count = count_lines_in_chunks([spool])
+        else:
+            with open_spool(spool) as spool_file:
+                line_count = count_lines_in_chunks(iter(lambda: spool_file.read(COUNT_LINES_CHUNK_SIZE), b""))
+
+        print(f"Total de linhas no arquivo {file_key}: {line_count}")
+        return line_count
+
+    except Exception as e:
+        error_message = f"Erro ao contar linhas no arquivo {file_key} (spool): {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=file_key,
+            process_name="count_lines_in_spool",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )
+        return None
+
+# Função que conta as linhas de um arquivo a partir de seus chunks de bytes
+def count_lines_in_chunks(chunks):
+    """
+    Conta as quebras de linha diretamente nos bytes, sem decodificar o conteúdo nem
+    criar strings por linha. O byte '\\n' nunca faz parte de um caractere multibyte em
+    UTF-8, Windows-1252 ou Latin-1, então a contagem não depende do encoding nem das
+    fronteiras entre chunks. A última linha é contada mesmo sem '\\n' no final.
+    """
+    line_count = 0
+    last_byte = b"\n"
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        line_count += chunk.count(b"\n")
+        last_byte = chunk[-1:]
+
+    # Adiciona a última linha se não terminar com quebra de linha
+    if last_byte != b"\n":
+        line_count += 1
+
+    return line_count
+
 # Função que retira espaços em string do dataframe
 def clean_column(col):
     """
     Remove espaços e aspas de colunas de texto
     Converte valores nulos em string vazia
+    Colunas object: uma única passada em Python por valor (strip e remoção das aspas).
+    Colunas string[pyarrow]: kernels Arrow vetorizados; colunas já limpas são devolvidas sem cópia.
     """
-    if col.dtype == object or col.dtype.name == "string":
-        return col.apply(lambda x: str(x).strip().replace('"','').replace("'",'') if pd.notnull(x) else "")
+    if not is_string_dtype(col.dtype):
+        return col
+    if getattr(col.dtype, "storage", None) != "pyarrow":
+        return pd.Series(
+            [value.strip().replace('"', '').replace("'", '') if value.__class__ is str else _clean_value(value) for value in col.to_numpy()],
+            index=col.index,
+            name=col.name,
+            dtype=object
+        )
+
+    has_nulls = col.isna().any()
+    has_dirty_text = col.str.contains(DIRTY_TEXT_PATTERN, regex=True, na=False).any()
+    if not has_nulls and not has_dirty_text:
+        return col
+
+    col = col.fillna("")
+    if has_dirty_text:
+        # Mesma ordem do tratamento original: strip e depois remoção das aspas
+        col = col.str.strip(STRIP_WHITESPACE_CHARS).str.replace('"', '', regex=False).str.replace("'", '', regex=False)
     return col
 
+# Função que limpa um valor não texto de uma coluna object (nulo vira "" e os demais seguem str(x))
+def _clean_value(value):
+    if value is None or value is pd.NA or value != value:
+        return ""
+    return str(value).strip().replace('"', '').replace("'", '')
+
@@ -1,11 +1,11 @@
 import json
-import boto3
 from messaging.publish_message import send_mail_exception
+from clients.s3_client import get_s3_client
 
 
 # Função para carregar JSON latam_parameters diretamente do S3
 def load_json_s3(bucket_name, s3_key):
-    s3_client = boto3.client('s3')
+    s3_client = get_s3_client()
     try:
         response = s3_client.get_object(Bucket=bucket_name, Key=s3_key)
         json_content = json.loads(response['Body'].read().decode('utf-8'))
@@ -0,0 +1,199 @@
+import csv
+import pandas as pd
+from readers.input_spool import open_spool, spool_source
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow é opcional: só é exigido quando read_engine = "arrow"
+    pa = None
+    pa_csv = None
+
+# Valores tratados como nulos pelo pandas.read_csv (na_values padrão), mantidos iguais na engine Arrow
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+]
+
+# Função que verifica se a engine Arrow pode ser usada para o separador informado
+def arrow_engine_available(separator):
+    if pa is None:
+        print("Aviso: pyarrow não está instalado, utilizando a engine pandas.")
+        return False
+    if separator is None or len(separator) != 1:
+        print(f"Aviso: a engine Arrow aceita apenas separadores de 1 caractere ('{separator}'), utilizando a engine pandas.")
+        return False
+    return True
+
+# Função que verifica se as colunas de texto podem ser mantidas em memória Arrow (string_storage = "arrow")
+def arrow_strings_available():
+    if pa is None:
+        print("Aviso: pyarrow não está instalado, colunas de texto mantidas como object.")
+        return False
+    return True
+
+# Função que define o dtype das colunas de texto lidas pelo pandas conforme o string_storage
+def string_dtype(string_storage):
+    """
+    "arrow": string[pyarrow] (um buffer contíguo por coluna, sem um objeto Python por valor);
+    "object": str, um objeto Python por valor.
+    """
+    return pd.StringDtype("pyarrow") if string_storage == "arrow" else str
+
+# Função que lê um arquivo delimitado com o leitor CSV multithread do Arrow
+def read_csv_arrow(spool, separator, encoding, skip_rows, columns_list, n_cols, chunk_size_rows=0, usecols=None):
+    """
+    Lê o arquivo delimitado do spool com o pyarrow.csv em colunas string (Arrow), com a mesma
+    semântica do pd.read_csv usado em process_file_generic:
+      - skip_rows = 0: a primeira linha é o cabeçalho;
+      - skip_rows > 0: pula skip_rows linhas e usa columns_list como nomes;
+      - apenas as n_cols primeiras colunas (ou as posições de usecols) são carregadas;
+      - os mesmos valores nulos padrão do pandas.
+    O Arrow não completa nem recorta linhas com quantidade de colunas diferente do cabeçalho
+    (ex.: trailer curto removido depois por delete_last_row); nesse caso a leitura é refeita pelo
+    pd.read_csv, que completa as colunas faltantes com nulo e ignora os campos excedentes.
+    Args:
+        spool: Spool do arquivo de entrada (caminho local ou bytes).
+        separator (str): Separador de 1 caractere (separator_file_read).
+        encoding (str): Encoding do arquivo (encoding_file_read).
+        skip_rows (int): Quantidade de linhas a pular.
+        columns_list (list): Nomes das colunas quando skip_rows > 0.
+        n_cols (int): Quantidade de colunas a carregar.
+        chunk_size_rows (int): Quando > 0, devolve um iterador de DataFrames com até chunk_size_rows linhas.
+        usecols (list): Posições das colunas a carregar (projeção), None = n_cols primeiras.
+    Returns:
+        DataFrame com colunas string[pyarrow] ou iterador de DataFrames.
+    """
+    if skip_rows > 0:
+        names = list(columns_list or [])
+        rows_to_skip = skip_rows
+    else:
+        names = _read_header(spool, separator, encoding)
+        rows_to_skip = 1
+
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        skip_rows=rows_to_skip,
+        column_names=names,
+        encoding=encoding
+    )
+    invalid_rows = []
+    parse_options = pa_csv.ParseOptions(delimiter=separator, invalid_row_handler=_invalid_row_handler(invalid_rows))
+    include_columns = [names[position] for position in usecols] if usecols is not None else names[:n_cols]
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=include_columns,
+        column_types={name: pa.string() for name in include_columns},
+        null_values=PANDAS_NA_VALUES,
+        strings_can_be_null=True
+    )
+
+    pandas_options = {
+        'sep': separator,
+        'encoding': encoding,
+        'skiprows': skip_rows,
+        'header': None if skip_rows > 0 else 0,
+        'names': columns_list if skip_rows > 0 else None,
+        'usecols': usecols if usecols is not None else range(n_cols)
+    }
+
+    if chunk_size_rows > 0:
+        return _iter_csv_chunks(spool, read_options, parse_options, convert_options, chunk_size_rows, invalid_rows, pandas_options)
+
+    try:
+        with open_spool(spool) as source:
+            table = pa_csv.read_csv(source, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    except pa.ArrowInvalid:
+        if not invalid_rows:
+            raise
+        _print_invalid_row(invalid_rows[0])
+        return _read_csv_pandas(spool, pandas_options)
+    return arrow_table_to_pandas(table)
+
+# Função que monta o handler das linhas com quantidade de colunas diferente do cabeçalho
+def _invalid_row_handler(invalid_rows):
+    """
+    O handler do Arrow só pode ignorar ("skip") ou rejeitar ("error") a linha: a linha é
+    registrada e rejeitada, e quem chamou refaz a leitura pelo pandas.
+    """
+    def handler(row):
+        invalid_rows.append(row)
+        return "error"
+    return handler
+
+# Função que registra no log a linha que levou à leitura pelo pandas
+def _print_invalid_row(row):
+    print(f"Aviso: linha com {row.actual_columns} coluna(s), esperadas {row.expected_columns} ('{row.text[:80]}'), utilizando a engine pandas.")
+
+# Função que lê o arquivo com o pd.read_csv, com as colunas de texto em memória Arrow como na engine Arrow
+def _read_csv_pandas(spool, pandas_options, chunk_size_rows=0):
+    return pd.read_csv(
+        spool_source(spool),
+        dtype=pd.StringDtype("pyarrow"),
+        index_col=None,
+        chunksize=chunk_size_rows or None,
+        **pandas_options
+    )
+
+# Função que converte uma tabela Arrow em DataFrame mantendo as strings em memória Arrow
+def arrow_table_to_pandas(table):
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+# Função que lê o arquivo em blocos (modo streaming) e reagrupa em chunk_size_rows linhas
+def _iter_csv_chunks(spool, read_options, parse_options, convert_options, chunk_size_rows, invalid_rows, pandas_options):
+    """
+    Se uma linha com quantidade de colunas diferente aparecer no meio do arquivo, a leitura
+    continua pelo pd.read_csv a partir do primeiro bloco ainda não devolvido (os blocos já
+    devolvidos têm sempre chunk_size_rows linhas, então os limites dos blocos coincidem).
+    """
+    emitted_chunks = 0
+    try:
+        with open_spool(spool) as source:
+            reader = pa_csv.open_csv(source, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+            pending = []
+            pending_rows = 0
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                while pending_rows >= chunk_size_rows:
+                    table = pa.Table.from_batches(pending, schema=reader.schema)
+                    yield arrow_table_to_pandas(table.slice(0, chunk_size_rows))
+                    emitted_chunks += 1
+                    pending = table.slice(chunk_size_rows).to_batches()
+                    pending_rows -= chunk_size_rows
+            if pending_rows > 0 or emitted_chunks == 0:
+                yield arrow_table_to_pandas(pa.Table.from_batches(pending, schema=reader.schema))
+        return
+    except pa.ArrowInvalid:
+        if not invalid_rows:
+            raise
+        _print_invalid_row(invalid_rows[0])
+
+    with _read_csv_pandas(spool, pandas_options, chunk_size_rows) as chunks:
+        for index, data in enumerate(chunks):
+            if index >= emitted_chunks:
+                # Índice a partir de 0 em cada bloco, como nos blocos lidos pelo Arrow
+                yield data.reset_index(drop=True)
+
+# Função que lê o cabeçalho do arquivo aplicando as mesmas regras de nomes do pandas
+def _read_header(spool, separator, encoding):
+    with open_spool(spool) as source:
+        first_line = source.readline().decode(encoding).lstrip("\ufeff").rstrip("\r\n")
+    header = next(csv.reader([first_line], delimiter=separator), [])
+    return pandas_header_names(header)
+
+# Função que aplica aos nomes do cabeçalho as mesmas regras do pandas
+def pandas_header_names(header):
+    """
+    Colunas sem nome e nomes duplicados seguem o padrão do pandas ("Unnamed: 3", "coluna.1").
+    """
+    names = []
+    seen = {}
+    for index, name in enumerate(header):
+        name = name if name != "" else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
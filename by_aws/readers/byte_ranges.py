@@ -0,0 +1,104 @@
+import io
+import mmap
+import os
+
+# Buffer da leitura sequencial de cada intervalo (a memória por processo não depende do tamanho do intervalo)
+LINE_RANGE_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+# Função que divide o spool em intervalos de bytes alinhados ao início das linhas
+def split_line_ranges(spool_path, n_ranges, skip_lines, tail_lines=0):
+    """
+    Divide o arquivo em até n_ranges intervalos de bytes [início, fim) que começam sempre no
+    início de uma linha, para que cada intervalo seja lido e transformado em um processo próprio.
+    Args:
+        spool_path (str): Caminho do spool local.
+        n_ranges (int): Quantidade desejada de intervalos.
+        skip_lines (int): Linhas iniciais (skip_rows ou cabeçalho) que ficam sempre no primeiro intervalo.
+        tail_lines (int): Linhas finais (delete_last_row) que devem ficar inteiras no último intervalo.
+    Returns:
+        tuple: (primeira linha do arquivo em bytes, lista de intervalos (início, fim)).
+               A primeira linha é usada como prefixo dos demais intervalos: cabeçalho quando
+               skip_rows = 0 ou linha a ser pulada (skip_rows = 1) quando skip_rows > 0.
+    """
+    size = os.path.getsize(spool_path)
+    if size == 0:
+        return b"", [(0, 0)]
+
+    with open(spool_path, "rb") as spool_file, mmap.mmap(spool_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        first_line_end = mapped.find(b"\n")
+        first_line = mapped[:first_line_end + 1] if first_line_end != -1 else mapped[:] + b"\n"
+
+        # Início dos dados: após as linhas puladas e o cabeçalho
+        data_start = 0
+        for _ in range(skip_lines):
+            newline = mapped.find(b"\n", data_start)
+            data_start = size if newline == -1 else newline + 1
+
+        # Fronteiras aproximadas, avançadas até o início da próxima linha
+        boundaries = [0]
+        for index in range(1, n_ranges):
+            target = data_start + (size - data_start) * index // n_ranges
+            newline = mapped.find(b"\n", max(target - 1, boundaries[-1], data_start - 1))
+            boundary = size if newline == -1 else newline + 1
+            if boundaries[-1] < boundary < size and boundary >= data_start:
+                boundaries.append(boundary)
+
+        # As últimas tail_lines linhas preenchidas precisam estar no último intervalo
+        if tail_lines > 0:
+            tail_start = size
+            found = 0
+            while found < tail_lines and tail_start > data_start:
+                newline = mapped.rfind(b"\n", data_start, tail_start - 1)
+                line_start = data_start if newline == -1 else newline + 1
+                if mapped[line_start:tail_start].strip():
+                    found += 1
+                tail_start = line_start
+            while len(boundaries) > 1 and boundaries[-1] > tail_start:
+                boundaries.pop()
+
+    boundaries.append(size)
+    return first_line, list(zip(boundaries[:-1], boundaries[1:]))
+
+# Função que descreve um intervalo de bytes do spool, precedido de um prefixo (cabeçalho), como um spool
+def line_range_spool(spool_path, start, end, prefix=b""):
+    """
+    O intervalo não é lido aqui: os leitores o abrem com open_line_range (via spool_source e
+    open_spool), como um arquivo limitado a end - start bytes após o prefixo, lido em blocos.
+    Returns:
+        dict: Caminho do spool, início, fim e prefixo do intervalo.
+    """
+    return {'path': spool_path, 'start': start, 'end': end, 'prefix': bytes(prefix)}
+
+# Função que verifica se o spool é um intervalo de bytes (line_range_spool)
+def is_line_range(spool):
+    return isinstance(spool, dict)
+
+# Função que abre um intervalo do spool como um arquivo binário: o prefixo seguido de end - start bytes
+def open_line_range(line_range):
+    return io.BufferedReader(_LineRangeStream(line_range), buffer_size=LINE_RANGE_BUFFER_SIZE)
+
+# Leitura sequencial do prefixo e, em seguida, do intervalo [início, fim) do spool
+class _LineRangeStream(io.RawIOBase):
+    def __init__(self, line_range):
+        self.prefix = memoryview(line_range['prefix'])
+        self.remaining = line_range['end'] - line_range['start']
+        self.spool_file = open(line_range['path'], "rb")
+        self.spool_file.seek(line_range['start'])
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if len(self.prefix) > 0:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        size = self.spool_file.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.spool_file.close()
+        super().close()
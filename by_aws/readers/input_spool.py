@@ -0,0 +1,185 @@
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from messaging.publish_message import send_mail_exception
+from clients.s3_client import get_s3_client
+from readers.byte_ranges import is_line_range, open_line_range
+from readers.compression import detect_compression, iter_decompressed_chunks, strip_compression_extension, DECOMPRESS_INPUT_CHUNK_SIZE
+
+# Tamanho dos blocos usados na cópia do S3 para o spool
+SPOOL_COPY_CHUNK_SIZE = 1024 * 1024  # 1MB por chunk
+
+# Download por intervalos (ranged GETs concorrentes) para objetos grandes
+RANGED_GET_MIN_BYTES = 64 * 1024 * 1024  # objetos a partir de 64MB
+RANGED_GET_PART_SIZE = 16 * 1024 * 1024  # 16MB por GET
+RANGED_GET_CONCURRENCY = 8
+
+# Função que baixa o arquivo do S3 uma única vez (spool local ou buffer em memória)
+def download_to_spool(bucket_name, file_key, spool_mode="disk", spool_dir=None, object_info=None,
+                      ranged_min_bytes=RANGED_GET_MIN_BYTES, part_size=RANGED_GET_PART_SIZE, max_concurrency=RANGED_GET_CONCURRENCY):
+    """
+    Baixa o objeto do S3 uma única vez para ser reutilizado pela leitura do cabeçalho,
+    pelo parse do arquivo e pela contagem de linhas.
+    Objetos com ContentLength (do head_object) a partir de ranged_min_bytes são baixados por
+    GETs de intervalos concorrentes, gravados direto na posição final do spool ou do buffer
+    pré-alocado. Os demais seguem com um único GET sequencial.
+    Arquivos comprimidos (gzip, bz2, zstd), identificados pela extensão ou pelos magic bytes,
+    são descomprimidos em streaming para um spool em disco, mesmo com spool_mode = "memory":
+    o conteúdo descomprimido nunca fica inteiro em memória.
+    Args:
+        bucket_name (str): Nome do bucket.
+        file_key (str): Chave do arquivo no bucket.
+        spool_mode (str): "disk" grava em arquivo temporário local, "memory" mantém em um buffer.
+        spool_dir (str): Diretório do spool em disco (padrão: diretório temporário do sistema).
+        object_info (dict): Resposta do head_object do arquivo (ContentLength e ETag), quando disponível.
+        ranged_min_bytes (int): Tamanho mínimo do objeto para o download por intervalos.
+        part_size (int): Tamanho de cada intervalo (bytes).
+        max_concurrency (int): Quantidade de GETs simultâneos.
+    Returns:
+        str | bytes | bytearray: Caminho do arquivo local ou conteúdo do arquivo em memória.
+    """
+    try:
+        s3_client = get_s3_client()
+        object_size = (object_info or {}).get('ContentLength')
+
+        if object_size is not None and object_size >= ranged_min_bytes and max_concurrency > 1:
+            spool = _download_ranges_to_spool(s3_client, bucket_name, file_key, object_info, spool_mode, spool_dir, part_size, max_concurrency)
+        else:
+            spool = _download_object_to_spool(s3_client, bucket_name, file_key, spool_mode, spool_dir)
+
+        return _decompress_spool(spool, file_key, spool_dir)
+
+    except Exception as e:
+        error_message = f"Erro ao baixar o arquivo {file_key} do bucket {bucket_name} para o spool: {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=file_key,
+            process_name="download_to_spool",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )
+        raise
+
+# Função que baixa o objeto com um único GET sequencial
+def _download_object_to_spool(s3_client, bucket_name, file_key, spool_mode, spool_dir):
+    response = s3_client.get_object(Bucket=bucket_name, Key=file_key)
+
+    if spool_mode == "memory":
+        spool = response['Body'].read()
+        print(f"# Arquivo s3://{bucket_name}/{file_key} carregado em memória ({len(spool)} bytes)")
+        return spool
+
+    suffix = os.path.splitext(file_key)[1]
+    with tempfile.NamedTemporaryFile("wb", suffix=suffix, dir=spool_dir, delete=False) as spool_file:
+        try:
+            shutil.copyfileobj(response['Body'], spool_file, SPOOL_COPY_CHUNK_SIZE)
+        except Exception:
+            spool_file.close()
+            os.remove(spool_file.name)
+            raise
+    print(f"# Arquivo s3://{bucket_name}/{file_key} copiado para o spool local: {spool_file.name}")
+    return spool_file.name
+
+# Função que baixa o objeto por GETs de intervalos concorrentes (spool pré-alocado)
+def _download_ranges_to_spool(s3_client, bucket_name, file_key, object_info, spool_mode, spool_dir, part_size, max_concurrency):
+    object_size = object_info['ContentLength']
+    # O ETag garante que todos os intervalos venham da mesma versão do objeto
+    etag = object_info.get('ETag')
+    ranges = [(start, min(start + part_size, object_size)) for start in range(0, object_size, part_size)]
+    print(f"# Download por intervalos: {len(ranges)} GETs de até {part_size} bytes, {max_concurrency} simultâneos")
+
+    def fetch_range(start, end, target):
+        request = {'Bucket': bucket_name, 'Key': file_key, 'Range': f"bytes={start}-{end - 1}"}
+        if etag:
+            request['IfMatch'] = etag
+        body = s3_client.get_object(**request)['Body']
+        position = start
+        for chunk in iter(lambda: body.read(SPOOL_COPY_CHUNK_SIZE), b""):
+            target(position, chunk)
+            position += len(chunk)
+        if position != end:
+            raise IOError(f"Intervalo {start}-{end - 1} incompleto: {position - start} de {end - start} bytes")
+
+    def fetch_all(target):
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(ranges))) as executor:
+            for future in [executor.submit(fetch_range, start, end, target) for start, end in ranges]:
+                future.result()
+
+    if spool_mode == "memory":
+        spool = bytearray(object_size)
+        buffer = memoryview(spool)
+
+        def write_to_buffer(position, chunk):
+            buffer[position:position + len(chunk)] = chunk
+
+        fetch_all(write_to_buffer)
+        print(f"# Arquivo s3://{bucket_name}/{file_key} carregado em memória ({object_size} bytes, por intervalos)")
+        return spool
+
+    suffix = os.path.splitext(file_key)[1]
+    with tempfile.NamedTemporaryFile("wb", suffix=suffix, dir=spool_dir, delete=False) as spool_file:
+        spool_file.truncate(object_size)
+    try:
+        # Os GETs compartilham o descritor: os.pwrite grava no offset informado, sem depender da posição do arquivo
+        descriptor = os.open(spool_file.name, os.O_WRONLY)
+        try:
+            fetch_all(lambda position, chunk: os.pwrite(descriptor, chunk, position))
+        finally:
+            os.close(descriptor)
+    except Exception:
+        os.remove(spool_file.name)
+        raise
+    print(f"# Arquivo s3://{bucket_name}/{file_key} copiado para o spool local: {spool_file.name} (por intervalos)")
+    return spool_file.name
+
+# Função que descomprime o spool em streaming para um novo spool em disco (arquivos comprimidos)
+def _decompress_spool(spool, file_key, spool_dir):
+    with open_spool(spool) as compressed_file:
+        compression = detect_compression(file_key, compressed_file.read(4))
+    if compression is None:
+        return spool
+
+    suffix = os.path.splitext(strip_compression_extension(file_key))[1]
+    try:
+        with open_spool(spool) as compressed_file, tempfile.NamedTemporaryFile("wb", suffix=suffix, dir=spool_dir, delete=False) as spool_file:
+            try:
+                compressed_chunks = iter(lambda: compressed_file.read(DECOMPRESS_INPUT_CHUNK_SIZE), b"")
+                for chunk in iter_decompressed_chunks(compressed_chunks, compression):
+                    spool_file.write(chunk)
+            except Exception:
+                spool_file.close()
+                os.remove(spool_file.name)
+                raise
+    finally:
+        release_spool(spool)
+    print(f"# Arquivo {file_key} ({compression}) descomprimido para o spool local: {spool_file.name}")
+    return spool_file.name
+
+# Função que devolve uma origem de leitura do spool para o pandas
+def spool_source(spool):
+    """
+    Devolve o caminho local (spool em disco) ou um novo buffer posicionado no início
+    (spool em memória ou intervalo do modo por intervalos), permitindo várias leituras sobre a
+    mesma cópia do arquivo.
+    """
+    if isinstance(spool, (bytes, bytearray)):
+        return io.BytesIO(spool)
+    if is_line_range(spool):
+        return open_line_range(spool)
+    return spool
+
+# Função que abre o spool em modo binário
+def open_spool(spool):
+    if isinstance(spool, (bytes, bytearray)):
+        return io.BytesIO(spool)
+    if is_line_range(spool):
+        return open_line_range(spool)
+    return open(spool, "rb")
+
+# Função que remove o spool local ao final do processamento
+def release_spool(spool):
+    if isinstance(spool, str) and os.path.exists(spool):
+        os.remove(spool)
+        print(f"# Spool local removido: {spool}")
@@ -48,6 +48,9 @@ try:
     AWS_REGION = secrets.get('AWS_REGION', 'us-east-1')
     SNS_TOPIC_ARN = secrets.get('SNS_TOPIC_ARN', '')
 
+    # Chave do hash das colunas sensíveis (apply_hash)
+    HASH_KEY = secrets.get('HASH_KEY', '')
+
 except Exception as e:
     print(f"Erro ao configurar variáveis de ambiente: {e}")
     raise
\ No newline at end of file
@@ -1,17 +1,117 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # sem pyarrow a saída "hex" é mantida em uma coluna object
+    pa = None
+
+try:
+    import xxhash
+except ImportError:  # xxhash é opcional: só é exigido quando hash_engine = "xxhash"
+    xxhash = None
+
+# Engines de hash disponíveis no parametro hash_engine
+HASH_ENGINES = ("blake2b", "xxhash")
+DEFAULT_HASH_ENGINE = "blake2b"
+
+# Formatos de saída das colunas com hash (parametro hash_output_format)
+# "int64": inteiro de 64 bits com sinal (8 bytes por valor)
+# "hex": texto hexadecimal de 16 caracteres, em memória Arrow (string[pyarrow])
+HASH_OUTPUT_FORMATS = ("int64", "hex")
+DEFAULT_HASH_OUTPUT_FORMAT = "int64"
+
+# Quantidade de valores distintos calculados por lote
+HASH_BATCH_SIZE = 65536
+
+# Dígitos usados na conversão vetorizada dos hashes para hexadecimal
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
 # Função hash subprocess
-def hash_deterministic(valor: str):
-    #print("=== Entrada ===")
-    #print(f"O dado de entrada: {valor}")
-    resultado = hash(valor)
-    #print("=== Saida ===")
-    #print(f"O dado de saida: {resultado}")
-    return resultado
+def hash_deterministic(valor: str, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key):
+    """
+    Hash estável (igual entre execuções, processos e máquinas) de um único valor, como inteiro de 64 bits com sinal.
+    """
+    return int(hash_values([str(valor)], hash_engine, hash_key=hash_key)[0])
+
+# Função que calcula o hash de uma lista de textos, em lotes, como um array int64
+def hash_values(values, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key):
+    """
+    Args:
+        values (list): Textos a serem convertidos.
+        hash_engine (str): "blake2b" (criptográfico com chave, padrão) ou "xxhash" (xxh3 64 bits com seed, não criptográfico).
+        hash_key (str): Chave do hash (HASH_KEY do Secrets Manager), obrigatória e nomeada. Com a mesma chave o resultado é sempre o mesmo.
+    Returns:
+        np.ndarray: Hashes int64, na ordem de values.
+    """
+    hash_function = _hash_function(hash_engine, hash_key)
+    hashes = np.empty(len(values), dtype=np.int64)
+    for start in range(0, len(values), HASH_BATCH_SIZE):
+        batch = values[start:start + HASH_BATCH_SIZE]
+        digests = b"".join(hash_function(value.encode("utf-8")) for value in batch)
+        hashes[start:start + len(batch)] = np.frombuffer(digests, dtype="<i8")
+    return hashes
+
+# Função que monta a função de digest de 8 bytes da engine escolhida
+def _hash_function(hash_engine, hash_key):
+    if hash_engine not in HASH_ENGINES:
+        raise ValueError(f"hash_engine inválido: {hash_engine} (valores aceitos: {', '.join(HASH_ENGINES)})")
+    key = hash_key.encode("utf-8") if isinstance(hash_key, str) else bytes(hash_key or b"")
+    # Sem chave o hash de identificadores com poucos valores possíveis (CPF, telefone) pode ser revertido
+    if not key:
+        raise ValueError("HASH_KEY não configurado: o hash exige uma chave (Secrets Manager)")
+    if hash_engine == "blake2b":
+        # O blake2b aceita chaves de até 64 bytes
+        if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+            key = hashlib.blake2b(key).digest()
+        return lambda data: hashlib.blake2b(data, digest_size=8, key=key).digest()
+    if hash_engine == "xxhash":
+        if xxhash is None:
+            raise ImportError("xxhash não está instalado: necessário para hash_engine = xxhash")
+        seed = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+        return lambda data: xxhash.xxh3_64_digest(data, seed=seed)[::-1]
+
+# Função que converte hashes int64 em texto hexadecimal de tamanho fixo (16 caracteres)
+def hashes_to_hex(hashes):
+    """
+    Conversão vetorizada: os 8 bytes de cada hash (big-endian) viram 16 dígitos em um único buffer.
+    Returns:
+        Array string[pyarrow] (buffer contíguo, sem um objeto Python por valor) ou array object sem pyarrow.
+    """
+    digest_bytes = hashes.astype(">i8").view(np.uint8).reshape(-1, 8)
+    hex_bytes = np.empty((len(hashes), 16), dtype=np.uint8)
+    hex_bytes[:, 0::2] = HEX_DIGITS[digest_bytes >> 4]
+    hex_bytes[:, 1::2] = HEX_DIGITS[digest_bytes & 0x0F]
+
+    if pa is None:
+        return hex_bytes.view("S16").ravel().astype(str).astype(object)
+    offsets = np.arange(0, 16 * (len(hashes) + 1), 16, dtype=np.int32)
+    hex_array = pa.StringArray.from_buffers(len(hashes), pa.py_buffer(offsets), pa.py_buffer(hex_bytes))
+    return pd.arrays.ArrowStringArray(hex_array)
 
 # Função que executa hash de colunas
-def apply_hash(data, columns_str):
-    columns = [col.strip() for col in columns_str.split(',')]
+def apply_hash(data, columns_str, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key, output_format=DEFAULT_HASH_OUTPUT_FORMAT):
+    """
+    Aplica o hash nas colunas informadas, calculando apenas os valores distintos de cada coluna
+    (factorize) e mapeando o resultado de volta às linhas. Valores nulos são tratados como texto vazio.
+    As colunas resultantes são int64 ou hexadecimais em memória Arrow (output_format), nunca
+    colunas object com um int Python por linha.
+    """
+    if output_format not in HASH_OUTPUT_FORMATS:
+        raise ValueError(f"hash_output_format inválido: {output_format} (valores aceitos: {', '.join(HASH_OUTPUT_FORMATS)})")
+
+    # columns_str: "col1,col2" ou a lista de colunas já separada (plano de transformação)
+    columns = [col.strip() for col in columns_str.split(',')] if isinstance(columns_str, str) else columns_str
     # Aplica o hash nas colunas especificadas
     for coluna in columns:
         if coluna in data.columns:
-            data[coluna] = data[coluna].apply(lambda x: hash_deterministic(x))    
-    return data
\ No newline at end of file
+            codes, unique_values = pd.factorize(data[coluna])
+            hashes = hash_values([str(value) for value in unique_values] + [""], hash_engine, hash_key=hash_key)
+            # O código -1 (nulo) aponta para o hash do texto vazio, último elemento
+            codes[codes < 0] = len(unique_values)
+            if output_format == "hex":
+                data[coluna] = hashes_to_hex(hashes).take(codes)
+            else:
+                data[coluna] = hashes.take(codes)
+    return data
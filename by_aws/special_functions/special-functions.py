@@ -1,9 +1,14 @@
 # Arquivo special_functions.py
 # Ultima Alteração: 2025-08-05 10:00:00
+import re
+import time
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from messaging.publish_message import send_mail_exception
+from special_functions.apply_hash import hash_deterministic, hash_values, DEFAULT_HASH_ENGINE
 
-def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper):
+def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key):
     """
     English:
     Hashes or modifies the operation code based on product and operation type.
@@ -13,6 +18,7 @@ def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper):
     - cod_prod_opel_locl: Local product operation code.
     - cod_mod_tx: Transaction mode code.
     - tx_or_oper: Indicates whether to return transaction mode or hashed operation code.
+    - hash_engine, hash_key: Stable hash engine and key; hash_key is required and keyword-only (see apply_hash.hash_deterministic).
     
     Returns:
     - str: Modified transaction mode or hashed operation code.
@@ -25,6 +31,7 @@ def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper):
     - cod_prod_opel_locl: Código de operación de producto local.
     - cod_mod_tx: Código de modo de transacción.
     - tx_or_oper: Indica si se debe devolver el modo de transacción o el código de operación hasheado.
+    - hash_engine, hash_key: Engine y clave del hash estable; hash_key es obligatoria y nombrada (ver apply_hash.hash_deterministic).
     
     Retorna:
     - str: Modo de transacción modificado o código de operación hasheado.
@@ -36,7 +43,7 @@ def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper):
         if tx_or_oper == "tx":
             return cod_mod_tx
         else:
-            cod_oper = hash(str(int(cod_oper)))
+            cod_oper = hash_deterministic(str(int(cod_oper)), hash_engine, hash_key=hash_key)
             return cod_oper
     else:
         if tx_or_oper == "tx":
@@ -44,7 +51,7 @@ def hash_if(cod_oper: str, cod_prod_opel_locl, cod_mod_tx, tx_or_oper):
         else:
             return cod_oper
 
-def skip_hash_traza_doc(columna: str):
+def skip_hash_traza_doc(columna: str, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key):
     """
     English:
     Skips hashing for specific document trace values.
@@ -69,9 +76,9 @@ def skip_hash_traza_doc(columna: str):
     elif columna == "000000000":
         return "000000000"
     else:
-        return hash(columna)
+        return hash_deterministic(columna, hash_engine, hash_key=hash_key)
 
-def skip_hash_vale(columna: str):
+def skip_hash_vale(columna: str, hash_engine=DEFAULT_HASH_ENGINE, *, hash_key):
     """
     English:
     Skips hashing for specific voucher values.
@@ -96,7 +103,7 @@ def skip_hash_vale(columna: str):
     elif columna == "999999999999":
         return "999999999999"
     else:
-        return hash(columna)
+        return hash_deterministic(columna, hash_engine, hash_key=hash_key)
 
 def delete_cero(columna: str):
     """
@@ -197,6 +204,219 @@ def delete_any(columna: str):
     columna = columna[:-1]
     return columna
 
+# Valores que skip_hash_traza_doc e skip_hash_vale mantêm sem hash
+TRAZA_DOC_SKIP_VALUES = ["         ", "000000000"]
+VALE_SKIP_VALUES = ["9999999", "999999999999"]
+
+# Valor usado por isInt para textos que não são inteiros
+NOT_INT_VALUE = "999999999999999999"
+
+# Inteiros sem sinal e só com dígitos ASCII: nesses valores int() equivale a remover os zeros à esquerda
+ASCII_DIGITS_PATTERN = r"[0-9]+"
+
+# Função que aplica uma função escalar apenas nos valores distintos de uma coluna
+def _apply_on_unique_values(values, func):
+    """
+    Usada nos casos fora do caminho vetorizado (sinais, espaços, "1_000", nulos...), garantindo
+    exatamente o mesmo resultado (e os mesmos erros) da função escalar.
+    Returns:
+        np.ndarray: Array object com o resultado de cada linha.
+    """
+    codes, unique_values = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(unique_values), dtype=object)
+    mapped[:] = [func(value) for value in unique_values]
+    return mapped.take(codes)
+
+# Função que identifica os textos formados só por dígitos ASCII
+def _ascii_digits_mask(values):
+    if not (pd.api.types.is_string_dtype(values) or values.dtype == object):
+        return np.zeros(len(values), dtype=bool)
+    return values.str.fullmatch(ASCII_DIGITS_PATTERN).fillna(False).to_numpy(dtype=bool)
+
+# Função que remove os zeros à esquerda (equivalente a str(int(valor))) de forma vetorizada
+def _int_strings(values):
+    result = np.empty(len(values), dtype=object)
+    digits = _ascii_digits_mask(values)
+    if digits.any():
+        stripped = values[digits].str.lstrip("0")
+        result[digits] = stripped.where(stripped != "", "0").to_numpy(dtype=object)
+    if not digits.all():
+        result[~digits] = _apply_on_unique_values(values[~digits], lambda value: str(int(value)))
+    return result
+
+# Função que calcula o hash estável de cada linha, apenas uma vez por valor distinto
+def _hash_column_values(values, hash_options):
+    codes, unique_values = pd.factorize(values, use_na_sentinel=False)
+    hashes = hash_values(
+        [str(value) for value in unique_values],
+        hash_options.get("hash_engine", DEFAULT_HASH_ENGINE),
+        hash_key=hash_options["hash_key"]
+    )
+    return np.array(hashes.tolist(), dtype=object).take(codes)
+
+# Função que mantém os valores sentinela e aplica o hash nos demais
+def _skip_hash_column(values, skip_values, hash_options):
+    result = values.to_numpy(dtype=object, copy=True)
+    to_hash = ~values.isin(skip_values).to_numpy(dtype=bool)
+    if to_hash.any():
+        result[to_hash] = _hash_column_values(values[to_hash], hash_options)
+    return result
+
+# Função vetorizada equivalente a hash_if
+def hash_if_column(data, args, hash_options):
+    """
+    "hash_if:cod_oper:cod_prod_opel_locl:cod_mod_tx:tx:coluna_resultado" (ou "oper" no lugar de "tx").
+    Para os produtos "2" e "3", códigos de operação com 11 caracteres têm os 2 últimos separados
+    como modo de transação; o código de operação (sem zeros à esquerda) recebe o hash.
+    """
+    cod_oper_col, cod_prod_col, cod_mod_tx_col, tx_or_oper = args
+    cod_oper = data[cod_oper_col]
+    special = data[cod_prod_col].isin(["2", "3"]).to_numpy(dtype=bool)
+
+    # Separa os 2 últimos caracteres dos códigos com 11 posições
+    split = special & (cod_oper.str.len() == 11).fillna(False).to_numpy(dtype=bool)
+
+    if tx_or_oper == "tx":
+        result = np.full(len(data), "", dtype=object)
+        result[special] = data[cod_mod_tx_col].to_numpy(dtype=object)[special]
+        result[split] = cod_oper[split].str[-2:].to_numpy(dtype=object)
+        return result
+
+    result = cod_oper.to_numpy(dtype=object, copy=True)
+    if special.any():
+        special_oper = cod_oper[special]
+        special_oper = special_oper.where(~split[special], special_oper.str[:-2])
+        result[special] = _hash_column_values(pd.Series(_int_strings(special_oper), dtype=object), hash_options)
+    return result
+
+# Função vetorizada equivalente a skip_hash_traza_doc
+def skip_hash_traza_doc_column(data, args, hash_options):
+    return _skip_hash_column(data[args[0]], TRAZA_DOC_SKIP_VALUES, hash_options)
+
+# Função vetorizada equivalente a skip_hash_vale
+def skip_hash_vale_column(data, args, hash_options):
+    return _skip_hash_column(data[args[0]], VALE_SKIP_VALUES, hash_options)
+
+# Função vetorizada equivalente a delete_cero
+def delete_cero_column(data, args, hash_options):
+    return _int_strings(pd.Series(isInt_column(data, args, hash_options), dtype=object))
+
+# Função vetorizada equivalente a toInt
+def toInt_column(data, args, hash_options):
+    values = data[args[0]]
+    # Em colunas só de textos, str(valor) devolve o próprio valor
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        return values.to_numpy(dtype=object, copy=True)
+    return _apply_on_unique_values(values, toInt)
+
+# Função vetorizada equivalente a isInt
+def isInt_column(data, args, hash_options):
+    values = data[args[0]]
+    result = values.to_numpy(dtype=object, copy=True)
+    digits = _ascii_digits_mask(values)
+    if not digits.all():
+        result[~digits] = _apply_on_unique_values(values[~digits], isInt)
+    return result
+
+# Função vetorizada equivalente a delete_any
+def delete_any_column(data, args, hash_options):
+    return data[args[0]].str[:-1].to_numpy(dtype=object)
+
+# Funções especiais aplicadas por coluna: "nome:coluna[:argumentos]:coluna_resultado"
+# Têm precedência sobre as funções escalares de mesmo nome em apply_special_functions
+COLUMN_FUNCTIONS = {
+    "hash_if": hash_if_column,
+    "skip_hash_traza_doc": skip_hash_traza_doc_column,
+    "skip_hash_vale": skip_hash_vale_column,
+    "delete_cero": delete_cero_column,
+    "toInt": toInt_column,
+    "isInt": isInt_column,
+    "delete_any": delete_any_column,
+}
+
+# Quantidade de argumentos (sem a coluna de resultado) validada em compile_special_functions
+SPECIAL_FUNCTION_ARGS = {
+    "hash_if": 4,
+    "skip_hash_traza_doc": 1,
+    "skip_hash_vale": 1,
+    "delete_cero": 1,
+    "toInt": 1,
+    "isInt": 1,
+    "delete_any": 1,
+    "concat_fields": 2,
+}
+
+# Funções especiais que calculam hash (exigem a HASH_KEY)
+HASH_SPECIAL_FUNCTIONS = ("hash_if", "skip_hash_traza_doc", "skip_hash_vale")
+
+# Dias de cada mês (índice = mês) usados na validação vetorizada das datas
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Formatos de concat_fields: tamanho do texto, formato de entrada, formato de saída e separador
+DATE_TIME_LAYOUTS = {
+    "date": (8, "%Y%m%d", "%Y-%m-%d", "-"),
+    "time": (6, "%H%M%S", "%H:%M:%S", ":"),
+}
+
+# Função que valida e formata por fatiamento textos AAAAMMDD ou HHMMSS só com dígitos ASCII
+def _slice_date_times(texts, kind):
+    """
+    Returns:
+        tuple: (array object com os textos formatados, array bool com os valores de data/hora existentes)
+    """
+    digits = np.array(texts, dtype="S").view(np.uint8).reshape(len(texts), -1)
+    pairs = (digits[:, 0::2] - ord("0")).astype(np.int64) * 10 + (digits[:, 1::2] - ord("0"))
+
+    if kind == "date":
+        year, month, day = pairs[:, 0] * 100 + pairs[:, 1], pairs[:, 2], pairs[:, 3]
+        leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_days = DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap_year & (month == 2))
+        # Anos menores que 1000 ficam para o strptime: o strftime não completa esses anos com zeros
+        valid = (year >= 1000) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+        groups = [digits[:, 0:4], digits[:, 4:6], digits[:, 6:8]]
+    else:
+        hour, minute, second = pairs[:, 0], pairs[:, 1], pairs[:, 2]
+        valid = (hour <= 23) & (minute <= 59) & (second <= 59)
+        groups = [digits[:, 0:2], digits[:, 2:4], digits[:, 4:6]]
+
+    # Monta "AAAA-MM-DD" / "HH:MM:SS" em um único buffer de bytes
+    separator = np.full((len(texts), 1), ord(DATE_TIME_LAYOUTS[kind][3]), dtype=np.uint8)
+    formatted = np.hstack([groups[0], separator, groups[1], separator, groups[2]])
+    return formatted.view(f"S{formatted.shape[1]}").ravel().astype(str).astype(object), valid
+
+# Função que formata os valores distintos de data (coluna 1) ou hora (coluna 2) de concat_fields
+def _format_unique_date_times(unique_values, kind):
+    """
+    Textos só com dígitos ASCII no tamanho exato (a hora usa os 6 primeiros caracteres) são
+    validados e formatados em bloco; os demais passam pelo strptime/strftime, com o mesmo
+    resultado da formatação linha a linha.
+    Returns:
+        np.ndarray: Array object com o texto formatado, None (formato inválido) ou a exceção gerada.
+    """
+    width, strptime_format, strftime_format, _ = DATE_TIME_LAYOUTS[kind]
+    texts = [value[:width] if kind == "time" and isinstance(value, str) else value for value in unique_values]
+    result = np.full(len(texts), None, dtype=object)
+
+    fast = np.array(
+        [isinstance(text, str) and len(text) == width and text.isascii() and text.isdigit() for text in texts],
+        dtype=bool
+    )
+    done = np.zeros(len(texts), dtype=bool)
+    if fast.any():
+        fast_positions = np.flatnonzero(fast)
+        formatted, valid = _slice_date_times([texts[position] for position in fast_positions], kind)
+        result[fast_positions[valid]] = formatted[valid]
+        done[fast_positions[valid]] = True
+
+    for position in np.flatnonzero(~done):
+        try:
+            result[position] = datetime.strptime(texts[position], strptime_format).strftime(strftime_format)
+        except ValueError:
+            result[position] = None
+        except Exception as e:
+            result[position] = e
+    return result
+
 def concat_fields(data: pd.DataFrame, special_functions_str: str) -> pd.DataFrame:
     """
     Concatena duas colunas de string (column1 e column2) em uma nova coluna com o nome especificado.
@@ -226,22 +446,40 @@ def concat_fields(data: pd.DataFrame, special_functions_str: str) -> pd.DataFram
     if column1 not in data.columns or column2 not in data.columns:
         raise ValueError(f"Colunas '{column1}' ou '{column2}' não encontradas no Dataframe")
     
-    # Concatena as colunas e aplica a máscara de formato
-    def format_columns(row):
-        column1_str = row[column1]
-        column2_str = row[column2]
-        try:
-            # Converte as strings para datetime e aplica o formato desejado
-            formatted_date = datetime.strptime(column1_str, "%Y%m%d").strftime("%Y-%m-%d")
-            formatted_time = datetime.strptime(column2_str[:6], "%H%M%S").strftime("%H:%M:%S") # String limitada a 6 caracteres para compor a hora:minuto:segundo
-            return f"{formatted_date} {formatted_time}"
-        except ValueError:
-            return f"{column1_str} {column2_str}"
-
-    # Concatena as colunas
+    # Concatena as colunas e aplica a máscara de formato ("AAAA-MM-DD HH:MM:SS"), calculada uma vez por valor distinto
+    # Hora limitada a 6 caracteres para compor a hora:minuto:segundo
     print(f"Nova coluna: {column_new_name}")
     # data[column_new_name] = data[column1].astype(str) + ' ' + data[column2].astype(str)
-    data[column_new_name] = data.apply(format_columns, axis=1)
+    date_codes, dates = pd.factorize(data[column1], use_na_sentinel=False)
+    time_codes, times = pd.factorize(data[column2], use_na_sentinel=False)
+    formatted_dates = _format_unique_date_times(dates, "date")
+    formatted_times = _format_unique_date_times(times, "time")
+
+    date_ok = np.array([isinstance(value, str) for value in formatted_dates], dtype=bool)
+    time_ok = np.array([isinstance(value, str) for value in formatted_times], dtype=bool)
+    date_error = np.array([isinstance(value, Exception) for value in formatted_dates], dtype=bool)
+    time_error = np.array([isinstance(value, Exception) for value in formatted_times], dtype=bool)
+
+    # Erros que não são de formato (ex.: valores nulos) continuam sendo propagados, como na versão linha a linha
+    row_error = date_error[date_codes] | (date_ok[date_codes] & time_error[time_codes])
+    if row_error.any():
+        position = np.flatnonzero(row_error)[0]
+        if date_error[date_codes[position]]:
+            raise formatted_dates[date_codes[position]]
+        raise formatted_times[time_codes[position]]
+
+    # Linhas válidas recebem data e hora formatadas; as demais, "col1 col2"
+    valid = date_ok[date_codes] & time_ok[time_codes]
+    raw_dates = np.array([f"{value}" for value in dates], dtype=object)
+    raw_times = np.array([f"{value}" for value in times], dtype=object)
+    result = np.empty(len(data), dtype=object)
+    result[valid] = formatted_dates.take(date_codes[valid]) + " " + formatted_times.take(time_codes[valid])
+    result[~valid] = raw_dates.take(date_codes[~valid]) + " " + raw_times.take(time_codes[~valid])
+    # O factorize une None e NaN: nessas linhas o texto sai do valor original da célula
+    null_rows = ~valid & (pd.isna(dates)[date_codes] | pd.isna(times)[time_codes])
+    for position in np.flatnonzero(null_rows):
+        result[position] = f"{data[column1].iat[position]} {data[column2].iat[position]}"
+    data[column_new_name] = result
     print(data.head(3))
 
     # Remove as colunas originais
@@ -265,7 +503,58 @@ def extract_fecha_ref(str_arquivo):
         # Se não encontrar uma data válida, retorna a data atual
         return datetime.now().strftime('%Y%m%d')
     
-def apply_special_functions(data,special_function_str):
+# Função que valida e resolve as funções especiais configuradas (uma única vez por tabela)
+def compile_special_functions(special_function_str):
+    """
+    Converte o parametro special_functions ("nome:arg1:arg2:coluna_resultado,...") em uma lista de
+    definições já resolvidas, usada por apply_special_functions em todos os arquivos e blocos.
+    Apenas as funções registradas em SPECIAL_FUNCTION_ARGS podem ser configuradas (uma nova função
+    especial precisa ser incluída ali); outros nomes do módulo (pd, time, extract_fecha_ref...) são
+    rejeitados.
+    Returns:
+        list: Um dicionário por função (definição, nome, argumentos, coluna de resultado e função).
+    Raises:
+        ValueError: Funções não registradas ou quantidade de argumentos inválida (todas as
+            definições inválidas em uma única mensagem).
+    """
+    if special_function_str in [None, "NULL", ""]:
+        return []
+
+    compiled = []
+    errors = []
+    for func_def in [func.strip() for func in special_function_str.split(",") if func.strip()]: # separador de funções sempre virgula
+        parts = func_def.split(":")
+        func_name = parts[0]
+        func_args = parts[1:-1]
+
+        # Resolve apenas as funções registradas (versões por coluna têm precedência)
+        expected_args = SPECIAL_FUNCTION_ARGS.get(func_name)
+        if expected_args is None:
+            errors.append(f"Função especial '{func_name}' não definida no codigo: {func_def} (valores aceitos: {', '.join(SPECIAL_FUNCTION_ARGS)})")
+            continue
+        if len(parts) < 2:
+            errors.append(f"Função especial '{func_name}' sem a coluna de resultado: {func_def}")
+            continue
+        if len(func_args) != expected_args:
+            errors.append(f"Função especial '{func_name}' espera {expected_args} argumento(s) e a coluna de resultado: {func_def}")
+            continue
+        column_func = COLUMN_FUNCTIONS.get(func_name)
+        func = globals()[func_name]
+
+        compiled.append({
+            'definition': func_def,
+            'name': func_name,
+            'args': func_args,
+            'results_column': parts[-1],
+            'column_func': column_func,
+            'func': func
+        })
+
+    if errors:
+        raise ValueError("; ".join(errors))
+    return compiled
+
+def apply_special_functions(data,special_function_str,hash_engine=DEFAULT_HASH_ENGINE,hash_key=""):
 # Função SPECIAL FUNCTIONS
 # Essa função irá receber nomes e parametros do campo special_functions no JSON PARAMETERS
 # Quando o parametro special_functions for <> de NULL o que estiver configurado será executado
@@ -278,40 +567,54 @@ def apply_special_functions(data,special_function_str):
 #   col1 --> primeiro argumento da função
 #   col2 --> segundo argumento da função
 #   col_soma --> é a nova coluna que vai receber o calculo da função em special_functions.py e que irá ser gravada no dataframe de saida com o resultado
-    if special_function_str in ["NULL",""]:
+#
+# Cada função configurada é chamada uma única vez com o DataFrame inteiro e a sua definição
+# (func(data, func_def)), e o tempo de execução de cada uma é registrado no log.
+# As funções de COLUMN_FUNCTIONS (hash_if, skip_hash_vale, delete_cero...) são aplicadas de forma
+# vetorizada na coluna inteira; as que usam hash recebem hash_engine e hash_key.
+# special_function_str também pode ser a lista já resolvida por compile_special_functions
+# (plano de transformação), evitando interpretar o texto a cada arquivo ou bloco.
+    functions = compile_special_functions(special_function_str) if isinstance(special_function_str, str) else special_function_str
+    if not functions:
         print('--> Nenhuma função especial aplicada.')
         return data
-    
-    functions = [func.strip() for func in special_function_str.split(",") if func.strip()] # separador de funções sempre virgula
 
-    for func_def in functions:
+    timings = []
+    hash_options = {'hash_engine': hash_engine, 'hash_key': hash_key}
+
+    for function in functions:
+        func_def = function['definition']
+        func_name = function['name']
+        func_args = function['args']
+        results_column = function['results_column']
         print(f"Valor da func_def: {func_def}")
-        parts = func_def.split(":")
-        func_name = parts[0]
-        results_column = parts[-1]
-        #func_name = "concat_fields"
-        #results_column = "fecha_hora"
         print("---------------------------------------------")
 
-        # Busca dinamicamente a função definida no codigo
-        func = globals().get(func_name)
-        if not callable(func):
-            print(f"--> Função '{func_name}' não definida no codigo...ignorando.")
-            continue
-
         try:
-            # Aplica a função e adiciona o resultado com uma nova coluna
-            data.apply(lambda row: func(data, func_def), axis=1)
-            print(f"--> Função: '{func_name}' aplicada com sucesso com os argumentos: {func_def}, o resultado na coluna: {results_column}")
+            # Aplica a função uma única vez sobre o DataFrame e adiciona o resultado com uma nova coluna
+            started = time.perf_counter()
+            if function['column_func'] is not None:
+                data[results_column] = function['column_func'](data, func_args, hash_options)
+                result = data
+            else:
+                result = function['func'](data, func_def)
+            elapsed = time.perf_counter() - started
+            if isinstance(result, pd.DataFrame):
+                data = result
+            timings.append((func_name, elapsed))
+            print(f"--> Função: '{func_name}' aplicada com sucesso com os argumentos: {func_args}, o resultado na coluna: {results_column} ({elapsed:.3f}s, {len(data)} linhas)")
         except Exception as e:
             print({str(e)})
             print(f"Erro ao aplicar a função especial '{func_name}' e argumentos {func_def}: {str(e)}")
             send_mail_exception(
-                file_name=file_path,
+                file_name=func_def,
                 process_name=f"Error: Special Function: {func_name}. Argumentos utilizados: {func_def}",
                 error_type=type(e).__name__,
                 additional_info=str(e)
             )
             raise            
-    
+
+    # Resumo dos tempos de execução das funções especiais
+    if timings:
+        print("--> Tempo das funções especiais: " + ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in timings))
     return data    
\ No newline at end of file
@@ -1,14 +1,38 @@
-import boto3
 import pandas as pd
 from datetime import datetime
 from io import StringIO
 from pathlib import Path
 from messaging.publish_message import send_mail_exception
+from clients.s3_client import get_s3_client
+
+# Função auxiliar que monta o registro de estatísticas iniciais (tracking_start.csv)
+def build_statistics_initial(bucket_name, path_local, filename_path_local, extension_file_source, validated_files_source, total_lines, file_creation_date, file_creation_time, modification_date, modification_time, path_s3, folder_s3, processing_start, creation_date_full, partition_date, fecha_ref, table_name):
+    #table_name = f"tbl_{path_local.split('/')[-1]}"
+    print(f"Tabela a ser carregada: {table_name}")
+    new_stats = {
+        'path_local': path_local,
+        'filename_path_local': filename_path_local,
+        'extension_file_source': extension_file_source,
+        'validated_files_source': validated_files_source,
+        'total_lines': total_lines,
+        'file_creation_date': file_creation_date,
+        'file_creation_time': file_creation_time,
+        'modification_date': modification_date,
+        'modification_time': modification_time,
+        'path_s3': bucket_name,
+        'folder_s3': folder_s3,
+        'processing_start': processing_start,
+        'creation_date_full': creation_date_full,
+        'partition_date': partition_date,
+        'fecha_ref': fecha_ref,
+        'table_name': table_name
+    }
+    return new_stats
 
 # Função auxiliar para salvar estatísticas iniciais
 def save_statistics_initial(bucket_name, path_local, filename_path_local, extension_file_source, validated_files_source, total_lines, file_creation_date, file_creation_time, modification_date, modification_time, path_s3, folder_s3, processing_start, creation_date_full, partition_date, fecha_ref, table_name):
     
-    s3 = boto3.client("s3")
+    s3 = get_s3_client()
     prefix = 'tracking/tracking_start.csv'
 
     try:
@@ -27,26 +51,7 @@ def save_statistics_initial(bucket_name, path_local, filename_path_local, extens
     stats_csv_path = prefix
 
     # Criar novo registro de estatísticas
-    #table_name = f"tbl_{path_local.split('/')[-1]}"
-    print(f"Tabela a ser carregada: {table_name}")
-    new_stats = {
-        'path_local': path_local,
-        'filename_path_local': filename_path_local,
-        'extension_file_source': extension_file_source,
-        'validated_files_source': validated_files_source,
-        'total_lines': total_lines,
-        'file_creation_date': file_creation_date,
-        'file_creation_time': file_creation_time,
-        'modification_date': modification_date,
-        'modification_time': modification_time,
-        'path_s3': bucket_name,
-        'folder_s3': folder_s3,
-        'processing_start': processing_start,
-        'creation_date_full': creation_date_full,
-        'partition_date': partition_date,
-        'fecha_ref': fecha_ref,
-        'table_name': table_name
-    }
+    new_stats = build_statistics_initial(bucket_name, path_local, filename_path_local, extension_file_source, validated_files_source, total_lines, file_creation_date, file_creation_time, modification_date, modification_time, path_s3, folder_s3, processing_start, creation_date_full, partition_date, fecha_ref, table_name)
 
     try:
         # Tentar ler arquivo existente
@@ -77,24 +82,8 @@ def save_statistics_initial(bucket_name, path_local, filename_path_local, extens
             additional_info=error_message
         )
 
-# Função auxiliar para salvar estatísticas finais
-def save_statistics_final(bucket_name, path_local, filename_path_local, filename_s3, extension_file_target, processing_end, processing_start):
-    s3 = boto3.client("s3")
-    stats_csv_path = 'tracking/tracking_end.csv'
-    
-    try:
-        s3.delete_object(Bucket=bucket_name, Key=stats_csv_path)
-        print(f"# Limpeza do arquivo: s3://{bucket_name}/{stats_csv_path}...OK")
-    except Exception as e:
-        error_message = f"Erro ao limpar o arquivo s3://{bucket_name}/{stats_csv_path}: {e}"
-        print(error_message)
-        send_mail_exception(
-            file_name=stats_csv_path,
-            process_name="clear_file_statistics_final",
-            error_type=type(e).__name__,
-            additional_info=error_message
-        )     
-    
+# Função auxiliar que monta o registro de estatísticas finais (tracking_end.csv)
+def build_statistics_final(path_local, filename_path_local, filename_s3, extension_file_target, processing_end, processing_start):
     # Convert timestamps to datetime objects
     start_datetime = datetime.strptime(processing_start, '%Y-%m-%d %H:%M:%S')
     end_datetime = datetime.strptime(processing_end, '%Y-%m-%d %H:%M:%S')
@@ -108,7 +97,6 @@ def save_statistics_final(bucket_name, path_local, filename_path_local, filename
     # Format the time difference as hh:mm:ss
     time_execution = str(time_difference)    
 
-    # Criar novo registro de estatísticas
     new_stats = {
         'path_local': path_local,
         'filename_path_local': filename_path_local,
@@ -118,6 +106,28 @@ def save_statistics_final(bucket_name, path_local, filename_path_local, filename
         'status':'PROCESSADO',
         'time_execution': time_execution # Formato : "00:00:00" 
     }
+    return new_stats
+
+# Função auxiliar para salvar estatísticas finais
+def save_statistics_final(bucket_name, path_local, filename_path_local, filename_s3, extension_file_target, processing_end, processing_start):
+    s3 = get_s3_client()
+    stats_csv_path = 'tracking/tracking_end.csv'
+    
+    try:
+        s3.delete_object(Bucket=bucket_name, Key=stats_csv_path)
+        print(f"# Limpeza do arquivo: s3://{bucket_name}/{stats_csv_path}...OK")
+    except Exception as e:
+        error_message = f"Erro ao limpar o arquivo s3://{bucket_name}/{stats_csv_path}: {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=stats_csv_path,
+            process_name="clear_file_statistics_final",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )     
+    
+    # Criar novo registro de estatísticas
+    new_stats = build_statistics_final(path_local, filename_path_local, filename_s3, extension_file_target, processing_end, processing_start)
 
     try:
         # Tentar ler arquivo existente
@@ -155,7 +165,7 @@ def generate_tracking_results(bucket_name):
     gera o arquivo tracking_results.csv particionado por data, fazendo append se já existir.
     """
     try:
-        s3_client = boto3.client('s3')
+        s3_client = get_s3_client()
 
         # Obtém a data atual para particionamento
         current_date = datetime.now()
@@ -228,4 +238,57 @@ def generate_tracking_results(bucket_name):
             process_name="generate_tracking_results",
             error_type=type(e).__name__,
             additional_info=error_message
-        )
\ No newline at end of file
+        )
+# Função para salvar o resumo por arquivo de uma execução em lote
+def save_batch_summary(bucket_name, results):
+    """
+    Exibe e grava no S3 o resumo de uma execução em lote (um registro por arquivo),
+    particionado por data ao lado do tracking_results.csv.
+    """
+    summary_df = pd.DataFrame(results, columns=['file_path', 'status', 'elapsed_seconds', 'error'])
+    print("### Resumo do processamento em lote ###")
+    print(summary_df.to_string(index=False) if not summary_df.empty else "Nenhum arquivo processado.")
+    print(summary_df['status'].value_counts().to_string() if not summary_df.empty else "")
+
+    current_date = datetime.now()
+    output_key = current_date.strftime('airflow_envios/year=%Y/month=%m/day=%d/batch_summary_%H%M%S.csv')
+    try:
+        s3 = get_s3_client()
+        buffer = StringIO()
+        summary_df.to_csv(buffer, sep=";", index=False)
+        s3.put_object(Bucket=bucket_name, Key=output_key, Body=buffer.getvalue())
+        print(f"Resumo do lote salvo no S3: s3://{bucket_name}/{output_key}")
+    except Exception as e:
+        error_message = f"Erro ao salvar resumo do lote no S3: {e}"
+        print(error_message)
+        send_mail_exception(
+            file_name=output_key,
+            process_name="save_batch_summary",
+            error_type=type(e).__name__,
+            additional_info=error_message
+        )
+
+# Função para gravar de uma só vez os registros de tracking coletados em uma execução em lote
+def save_tracking_rows(bucket_name, tracking_rows):
+    """
+    Grava tracking_start.csv e tracking_end.csv com todos os registros coletados pelo processo
+    principal, evitando que processos concorrentes sobrescrevam os arquivos de tracking.
+    Args:
+        tracking_rows (dict): {'start': [registros iniciais], 'end': [registros finais]}
+    """
+    s3 = get_s3_client()
+    for stats_csv_path, rows in (('tracking/tracking_start.csv', tracking_rows['start']), ('tracking/tracking_end.csv', tracking_rows['end'])):
+        try:
+            buffer = StringIO()
+            pd.DataFrame(rows).to_csv(buffer, sep=";", index=False)
+            s3.put_object(Bucket=bucket_name, Key=stats_csv_path, Body=buffer.getvalue())
+            print(f"Estatísticas atualizadas no S3: s3://{bucket_name}/{stats_csv_path} ({len(rows)} registro(s))")
+        except Exception as e:
+            error_message = f"Erro ao salvar estatísticas do lote no S3: {e}"
+            print(error_message)
+            send_mail_exception(
+                file_name=stats_csv_path,
+                process_name="save_tracking_rows",
+                error_type=type(e).__name__,
+                additional_info=error_message
+            )
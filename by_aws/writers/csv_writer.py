@@ -0,0 +1,21 @@
+# Quantidade de linhas convertidas em CSV por vez (limita o tamanho de cada bloco de texto)
+CSV_ENCODE_BLOCK_ROWS = 100000
+
+# Função que converte blocos de um DataFrame em blocos de bytes no formato CSV de saída
+def iter_csv_bytes(chunks, header=True, encoding="utf-8", block_rows=CSV_ENCODE_BLOCK_ROWS):
+    """
+    Gera o CSV de saída (sep=";", sem índice) em blocos de até block_rows linhas já codificados
+    em bytes, sem montar o arquivo inteiro em memória. O cabeçalho é gravado apenas no primeiro
+    bloco quando header=True. O conteúdo é idêntico ao de data.to_csv(index=False, sep=";").
+    Args:
+        chunks: DataFrames (o arquivo inteiro ou os blocos do modo streaming), na ordem do arquivo.
+    Returns:
+        Iterador de bytes.
+    """
+    first = True
+    for chunk in chunks:
+        # Blocos vazios também passam pelo to_csv: o primeiro gera o cabeçalho
+        for start in range(0, max(len(chunk), 1), block_rows):
+            block = chunk.iloc[start:start + block_rows]
+            yield block.to_csv(index=False, sep=";", header=header and first).encode(encoding)
+            first = False
@@ -0,0 +1,111 @@
+import queue
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: só é exigido quando output_compression = "zstd"
+    zstandard = None
+
+# Compressões aceitas no parametro output_compression, com a extensão adicionada à chave do S3
+# e o ContentType gravado no objeto
+OUTPUT_COMPRESSIONS = ("gzip", "zstd")
+OUTPUT_COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+OUTPUT_CONTENT_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+
+# Níveis de compressão (equilíbrio entre tamanho e CPU)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Quantidade máxima de blocos aguardando a compressão (limita a memória entre as threads)
+COMPRESS_QUEUE_BLOCKS = 8
+
+# Função que verifica se a compressão informada pode ser usada
+def output_compression_available(compression):
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstandard não está instalado: necessário para output_compression = zstd")
+    return True
+
+# Função que define os metadados do objeto no S3 para a compressão informada
+def output_upload_args(compression):
+    """
+    O objeto (.csv.gz / .csv.zst) é gravado como o arquivo comprimido, sem ContentEncoding:
+    clientes HTTP e o console do S3 não o descomprimem de forma transparente no download.
+    """
+    if compression is None:
+        return {}
+    return {'ContentType': OUTPUT_CONTENT_TYPES[compression]}
+
+# Função que comprime em uma thread os blocos de bytes gerados, devolvendo os blocos comprimidos
+def iter_compressed_bytes(byte_chunks, compression):
+    """
+    Os blocos são gerados na thread de quem chama (transformações e CSV) e
+    comprimidos em uma thread própria (zlib e zstandard liberam o GIL), em paralelo com a
+    geração dos blocos seguintes e com o envio das partes já comprimidas.
+    A fila entre as threads é limitada a COMPRESS_QUEUE_BLOCKS blocos.
+    Erros da compressão são propagados para quem consome os blocos.
+    """
+    raw_blocks = queue.Queue(maxsize=COMPRESS_QUEUE_BLOCKS)
+    compressed_blocks = queue.Queue()
+    end_of_stream = object()
+    errors = []
+
+    def compress_worker():
+        try:
+            compressor = _new_compressor(compression)
+            while True:
+                block = raw_blocks.get()
+                if block is None:
+                    break
+                compressed = compressor.compress(block)
+                if compressed:
+                    compressed_blocks.put(compressed)
+            compressed_blocks.put(compressor.flush())
+        except BaseException as e:
+            errors.append(e)
+            # Continua consumindo a fila para que quem gera os blocos nunca fique bloqueado
+            while raw_blocks.get() is not None:
+                pass
+        finally:
+            compressed_blocks.put(end_of_stream)
+
+    # Devolve os blocos comprimidos disponíveis (ou todos, até o fim, quando wait=True)
+    def drain(wait=False):
+        while True:
+            try:
+                block = compressed_blocks.get(block=wait)
+            except queue.Empty:
+                return
+            if block is end_of_stream:
+                if errors:
+                    raise errors[0]
+                return
+            yield block
+
+    worker = threading.Thread(target=compress_worker, name=f"compress-{compression}", daemon=True)
+    worker.start()
+    finished = False
+    try:
+        for block in byte_chunks:
+            if block:
+                raw_blocks.put(block)
+            if errors:
+                raise errors[0]
+            yield from drain()
+        raw_blocks.put(None)
+        finished = True
+        yield from drain(wait=True)
+    finally:
+        # Interrompido (erro na geração dos blocos ou no envio): encerra a thread de compressão
+        if not finished:
+            raw_blocks.put(None)
+        worker.join()
+
+# Função que cria o compressor incremental do formato informado
+def _new_compressor(compression):
+    if compression == "gzip":
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    if compression == "zstd":
+        output_compression_available(compression)
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"Compressão não suportada: {compression}")
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import pandas as pd
+from pandas.api.types import infer_dtype, is_integer_dtype, is_string_dtype
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: só é exigido quando extension_file_target = "parquet"
+    pa = None
+    pq = None
+
+# Quantidade de linhas por row group dos arquivos Parquet de saída
+PARQUET_ROW_GROUP_ROWS = 1000000
+
+# Compressões aceitas no parametro parquet_compression
+PARQUET_COMPRESSIONS = ("snappy", "zstd")
+DEFAULT_PARQUET_COMPRESSION = "snappy"
+
+# Função que verifica se o Parquet pode ser gerado (pyarrow instalado)
+def parquet_available():
+    return pq is not None
+
+# Destino do ParquetWriter que guarda os bytes gravados até serem consumidos pelo upload
+class _ParquetSink:
+    def __init__(self):
+        self.blocks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        block = bytes(data)
+        self.blocks.append(block)
+        self.position += len(block)
+        return len(block)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+# Função que define o schema Parquet de saída a partir do primeiro bloco
+def output_schema(chunk):
+    """
+    Colunas inteiras (hash int64) são gravadas como int64 e as demais como texto, com o mesmo
+    conteúdo do CSV de saída. O schema do primeiro bloco vale para todo o arquivo.
+    """
+    return pa.schema([
+        pa.field(str(name), pa.int64() if is_integer_dtype(dtype) else pa.string())
+        for name, dtype in zip(chunk.columns, chunk.dtypes)
+    ])
+
+# Função que converte um bloco do DataFrame em uma tabela Arrow com o schema de saída
+def frame_to_arrow(chunk, schema):
+    arrays = []
+    for position, field in enumerate(schema):
+        column = chunk.iloc[:, position]
+        # Valores não texto (ex.: bool, int em colunas object) seguem o texto do CSV (str(x))
+        is_text = isinstance(column.dtype, pd.CategoricalDtype) or (
+            is_string_dtype(column.dtype) and (column.dtype != object or infer_dtype(column, skipna=True) in ("string", "empty"))
+        )
+        if not is_text and not pa.types.is_integer(field.type):
+            column = column.where(column.isna(), column.astype(str))
+        arrays.append(pa.array(column, from_pandas=True).cast(field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+# Função que converte blocos de um DataFrame em um arquivo Parquet, gerado em blocos de bytes
+def iter_parquet_bytes(chunks, row_group_rows=PARQUET_ROW_GROUP_ROWS, compression=DEFAULT_PARQUET_COMPRESSION):
+    """
+    Os blocos são acumulados (em memória Arrow, sem cópia) até row_group_rows linhas e gravados
+    como row groups completos, assim o tamanho dos row groups não depende do chunk_size_rows.
+    Os bytes de cada row group são devolvidos assim que gravados, para o upload em partes.
+    O dicionário do Parquet (use_dictionary) guarda uma única vez os valores repetidos.
+    Args:
+        chunks: DataFrames ou tabelas Arrow (arquivos parciais do modo por intervalos), na ordem do arquivo.
+        row_group_rows (int): Linhas por row group.
+        compression (str): "snappy" ou "zstd".
+    Returns:
+        Iterador de bytes.
+    """
+    sink = _ParquetSink()
+    writer = None
+    schema = None
+    pending = []
+    pending_rows = 0
+    try:
+        for chunk in chunks:
+            if schema is None:
+                schema = chunk.schema if isinstance(chunk, pa.Table) else output_schema(chunk)
+                writer = pq.ParquetWriter(sink, schema, compression=compression, use_dictionary=True)
+            table = chunk.cast(schema) if isinstance(chunk, pa.Table) else frame_to_arrow(chunk, schema)
+            pending.append(table)
+            pending_rows += table.num_rows
+            if pending_rows >= row_group_rows:
+                combined = pa.concat_tables(pending)
+                full_rows = pending_rows - pending_rows % row_group_rows
+                writer.write_table(combined.slice(0, full_rows), row_group_size=row_group_rows)
+                pending = [combined.slice(full_rows)]
+                pending_rows -= full_rows
+                yield from sink.drain()
+
+        if writer is None:
+            return
+        if pending_rows > 0:
+            writer.write_table(pa.concat_tables(pending), row_group_size=row_group_rows)
+        writer.close()
+        writer = None
+        yield from sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+
+# Função que grava blocos de um DataFrame em um arquivo Arrow IPC temporário local (parte do modo por intervalos)
+def write_arrow_part(chunks):
+    """
+    As partes de cada intervalo são gravadas em Arrow IPC, sem compressão, e reunidas em um único
+    Parquet no envio (iter_arrow_parts): arquivos Parquet não podem ser concatenados.
+    Returns:
+        str: Caminho do arquivo gerado.
+    """
+    part = tempfile.NamedTemporaryFile("wb", suffix=".arrow", delete=False)
+    try:
+        with part:
+            writer = None
+            schema = None
+            for chunk in chunks:
+                if schema is None:
+                    schema = output_schema(chunk)
+                    writer = pa.ipc.new_stream(part, schema)
+                writer.write_table(frame_to_arrow(chunk, schema))
+            if writer is not None:
+                writer.close()
+    except Exception:
+        os.remove(part.name)
+        raise
+    return part.name
+
+# Função que lê as partes Arrow IPC em sequência, como tabelas Arrow
+def iter_arrow_parts(paths):
+    for path in paths:
+        if os.path.getsize(path) == 0:
+            continue
+        with pa.OSFile(path, "rb") as source:
+            reader = pa.ipc.open_stream(source)
+            for batch in reader:
+                yield pa.Table.from_batches([batch])
@@ -0,0 +1,268 @@
+import json
+import re
+from special_functions import compile_special_functions, HASH_SPECIAL_FUNCTIONS
+from special_functions.apply_hash import HASH_ENGINES, HASH_OUTPUT_FORMATS, DEFAULT_HASH_ENGINE, DEFAULT_HASH_OUTPUT_FORMAT
+from operations.operations_type import parse_add_columns, parse_rename_columns, parse_date_format, CATEGORICAL_MAX_UNIQUE_PCT
+from readers.input_spool import RANGED_GET_MIN_BYTES, RANGED_GET_PART_SIZE, RANGED_GET_CONCURRENCY
+from readers.arrow_csv_reader import arrow_engine_available, arrow_strings_available
+from readers.compression import strip_compression_extension
+from writers.s3_multipart_upload import MULTIPART_PART_SIZE, MULTIPART_MIN_PART_SIZE, MULTIPART_CONCURRENCY
+from writers.output_compression import output_compression_available, OUTPUT_COMPRESSIONS
+from writers.parquet_writer import parquet_available, PARQUET_ROW_GROUP_ROWS, PARQUET_COMPRESSIONS, DEFAULT_PARQUET_COMPRESSION
+
+# Tamanho mínimo do arquivo para o processamento por intervalos (parallel_ranges)
+PARALLEL_RANGES_MIN_BYTES = 64 * 1024 * 1024  # 64MB
+
+# Extensões aceitas para arquivos delimitados e posicionais (separator_file_read = NULL)
+DELIMITED_EXTENSIONS = {"csv", "txt", "lis", "dat"}
+FIXED_WIDTH_EXTENSIONS = {"dat", "txt"}
+
+# Valores aceitos nos parametros de engine
+READ_ENGINES = ("pandas", "arrow")
+FIXED_WIDTH_ENGINES = ("pandas", "mmap")
+INPUT_SPOOL_MODES = ("disk", "memory")
+STRING_STORAGES = ("arrow", "object")
+
+# Função que verifica se um parametro de texto está vazio (ausente, "" ou NULL)
+def _is_null(value):
+    return value is None or str(value).strip() in ("", "NULL")
+
+# Função que lê um parametro inteiro não negativo (vazio ou NULL = default)
+def _int_parameter(parameters, name, default=0):
+    value = parameters.get(name, default)
+    if _is_null(value):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} deve ser um número inteiro: {value!r}")
+    if number < 0:
+        raise ValueError(f"{name} não pode ser negativo: {value!r}")
+    return number
+
+# Função que lê um parametro com valores fixos (sem diferenciar maiúsculas)
+def _choice_parameter(parameters, name, choices, default):
+    value = str(parameters.get(name, default) or default).strip().lower()
+    if value not in choices:
+        raise ValueError(f"{name} inválido: {value} (valores aceitos: {', '.join(choices)})")
+    return value
+
+# Função que lê o tamanho das partes do upload em partes (mínimo do S3: 5MB)
+def _upload_part_size(parameters):
+    part_size = _int_parameter(parameters, "upload_part_size_bytes", MULTIPART_PART_SIZE)
+    if part_size < MULTIPART_MIN_PART_SIZE:
+        raise ValueError(f"upload_part_size_bytes deve ser de ao menos {MULTIPART_MIN_PART_SIZE} bytes: {part_size}")
+    return part_size
+
+# Função que lê o tamanho dos intervalos do download por intervalos (ranged GET)
+def _ranged_get_part_size(parameters):
+    part_size = _int_parameter(parameters, "ranged_get_part_size_bytes", RANGED_GET_PART_SIZE)
+    if part_size == 0:
+        raise ValueError("ranged_get_part_size_bytes deve ser maior que zero")
+    return part_size
+
+# Função que define o formato do arquivo de saída pelo extension_file_target ("parquet" ou CSV)
+def _output_options(parameters):
+    """
+    Returns:
+        dict: file_format ("csv" ou "parquet"), compressão do CSV (output_compression) e, no Parquet,
+              linhas por row group e compressão.
+    """
+    file_format = "parquet" if str(parameters.get("extension_file_target", "csv")).strip().lower() == "parquet" else "csv"
+    if file_format == "parquet" and not parquet_available():
+        raise ValueError("pyarrow não está instalado: necessário para extension_file_target = parquet")
+    row_group_rows = _int_parameter(parameters, "parquet_row_group_rows", PARQUET_ROW_GROUP_ROWS)
+    if row_group_rows == 0:
+        raise ValueError("parquet_row_group_rows deve ser maior que zero")
+    # Compressão do CSV de saída: "gzip", "zstd" ou NULL (sem compressão, padrão)
+    compression = None
+    if not _is_null(parameters.get("output_compression")):
+        compression = _choice_parameter(parameters, "output_compression", OUTPUT_COMPRESSIONS, "")
+        if file_format == "parquet":
+            raise ValueError("output_compression vale apenas para a saída CSV (no Parquet, use parquet_compression)")
+        output_compression_available(compression)
+    return {
+        'file_format': file_format,
+        'compression': compression,
+        'parquet_row_group_rows': row_group_rows,
+        'parquet_compression': _choice_parameter(parameters, "parquet_compression", PARQUET_COMPRESSIONS, DEFAULT_PARQUET_COMPRESSION)
+    }
+
+# Função que converte o parametro widths (lista JSON) em uma lista de larguras
+def _parse_widths(widths_param):
+    widths = json.loads(widths_param)
+    if not isinstance(widths, list) or not widths or not all(isinstance(width, int) and not isinstance(width, bool) and width > 0 for width in widths):
+        raise ValueError(f"widths deve ser uma lista JSON de inteiros positivos: {widths_param}")
+    return widths
+
+# Função que lista as colunas lidas pelas funções operacionais após o drop_columns
+def _operation_columns(plan):
+    """
+    Colunas de date_format, hash_columns e special_functions (argumentos e colunas de resultado)
+    continuam como texto: a codificação category (encode_low_cardinality_columns) vale apenas
+    para as demais colunas.
+    """
+    columns = set()
+    for column_name, _, _ in plan['date_format'] or []:
+        columns.add(column_name)
+    columns.update(plan['hash_columns'] or [])
+    for function in plan['special_functions']:
+        columns.update(str(arg).strip() for arg in function['args'])
+        columns.add(function['results_column'])
+    return columns
+
+# Função que compila o arquivo de parametros (latam_parameter_*.json) em um plano de transformação
+def compile_transform_plan(parameters, hash_key=""):
+    """
+    Interpreta e valida uma única vez os parametros de texto da tabela (widths, column_names,
+    add/rename/drop_columns, date_format, hash_columns, special_functions, regex_pattern...).
+    O plano é reaproveitado por todos os arquivos de um lote e por todos os blocos no modo
+    streaming, sem interpretar os textos novamente, e configurações inválidas são rejeitadas
+    antes de qualquer leitura de dados.
+    hash_key é a HASH_KEY do Secrets Manager: obrigatória quando hash_columns ou funções especiais
+    com hash estão configuradas (não é guardada no plano).
+    Returns:
+        dict: Plano de transformação (valores já convertidos, regex compilado e funções resolvidas).
+    Raises:
+        ValueError: Com todos os problemas encontrados nos parametros.
+    """
+    errors = []
+
+    # Compila um item do plano, acumulando os erros para reportar todos de uma só vez
+    def compile_item(name, compile_func, default=None):
+        try:
+            return compile_func()
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            return default
+
+    # Leitura: tipo de arquivo, separador, colunas e larguras
+    # Arquivos comprimidos (ex.: csv.gz, dat.zst) são tratados pela extensão do conteúdo
+    extension_file = strip_compression_extension(parameters.get("extension_file", "CSV")).lower()
+    separator_file_read = parameters.get("separator_file_read")
+    is_fixed_width = extension_file in FIXED_WIDTH_EXTENSIONS and separator_file_read == "NULL"
+    if not is_fixed_width and extension_file not in DELIMITED_EXTENSIONS:
+        errors.append(f"extension_file: extensão não suportada: {extension_file}")
+
+    widths = None
+    if is_fixed_width:
+        widths_param = parameters.get("widths", None)
+        if _is_null(widths_param):
+            errors.append("widths: obrigatório para arquivos posicionais (separator_file_read = NULL)")
+        else:
+            widths = compile_item("widths", lambda: _parse_widths(widths_param))
+
+    # Converte a string em lista apenas se não estiver vazia
+    columns_names = parameters.get("column_names", "")
+    columns_list = columns_names.split(",") if columns_names else None
+    skip_rows = compile_item("skip_rows", lambda: _int_parameter(parameters, "skip_rows"), 0)
+
+    # Número de colunas conhecido pelos parametros (None = lido do cabeçalho de cada arquivo)
+    n_cols = None
+    if skip_rows > 0:
+        if not columns_list:
+            errors.append("column_names: obrigatório quando skip_rows > 0")
+        n_cols = len(columns_list) if columns_list else 0
+        if widths is not None and n_cols > len(widths):
+            errors.append(f"column_names: {n_cols} colunas para {len(widths)} larguras em widths")
+    elif widths is not None:
+        n_cols = len(widths)
+
+    separator = separator_file_read if separator_file_read is not None else ";"
+    read_engine = compile_item("read_engine", lambda: _choice_parameter(parameters, "read_engine", READ_ENGINES, "pandas"), "pandas")
+    if read_engine == "arrow" and not is_fixed_width and not arrow_engine_available(separator):
+        read_engine = "pandas"
+
+    # Armazenamento das colunas de texto: "arrow" (string[pyarrow], padrão) ou "object"
+    string_storage = compile_item("string_storage", lambda: _choice_parameter(parameters, "string_storage", STRING_STORAGES, "arrow"), "object")
+    if string_storage == "arrow" and not arrow_strings_available():
+        string_storage = "object"
+
+    # Funções operacionais
+    def null_or(name, compile_func):
+        value = parameters.get(name)
+        return None if _is_null(value) else compile_item(name, lambda: compile_func(value))
+
+    plan = {
+        'extension_file': extension_file,
+        'is_fixed_width': is_fixed_width,
+        'separator': separator,
+        'encoding': parameters.get("encoding_file_read", "utf-8"),
+        'read_engine': read_engine,
+        'fixed_width_engine': compile_item("fixed_width_engine", lambda: _choice_parameter(parameters, "fixed_width_engine", FIXED_WIDTH_ENGINES, "pandas")),
+        'widths': widths,
+        'columns_list': columns_list,
+        'skip_rows': skip_rows,
+        'n_cols': n_cols,
+        'chunk_size_rows': compile_item("chunk_size_rows", lambda: _int_parameter(parameters, "chunk_size_rows")),
+        'delete_last_row': compile_item("delete_last_row", lambda: _int_parameter(parameters, "delete_last_row")),
+        'input_spool_mode': compile_item("input_spool_mode", lambda: _choice_parameter(parameters, "input_spool_mode", INPUT_SPOOL_MODES, "disk")),
+        'ranged_get_min_bytes': compile_item("ranged_get_min_bytes", lambda: _int_parameter(parameters, "ranged_get_min_bytes", RANGED_GET_MIN_BYTES)),
+        'ranged_get_part_size': compile_item("ranged_get_part_size_bytes", lambda: _ranged_get_part_size(parameters)),
+        'ranged_get_concurrency': compile_item("ranged_get_concurrency", lambda: _int_parameter(parameters, "ranged_get_concurrency", RANGED_GET_CONCURRENCY)),
+        'parallel_ranges': compile_item("parallel_ranges", lambda: _int_parameter(parameters, "parallel_ranges")),
+        'parallel_ranges_min_bytes': compile_item("parallel_ranges_min_bytes", lambda: _int_parameter(parameters, "parallel_ranges_min_bytes", PARALLEL_RANGES_MIN_BYTES)),
+        'string_storage': string_storage,
+        # Percentual máximo de valores distintos (amostra) para codificar a coluna como category (0 = desativado)
+        'categorical_max_unique_pct': compile_item("categorical_max_unique_pct", lambda: _int_parameter(parameters, "categorical_max_unique_pct", CATEGORICAL_MAX_UNIQUE_PCT)),
+        'add_columns': null_or("add_columns", parse_add_columns),
+        'rename_columns': null_or("rename_columns", parse_rename_columns),
+        'drop_columns': null_or("drop_columns", lambda value: value.split(",")),
+        'date_format': null_or("date_format", parse_date_format),
+        'hash_columns': null_or("hash_columns", lambda value: [col.strip() for col in value.split(',')]),
+        'hash_engine': compile_item("hash_engine", lambda: _choice_parameter(parameters, "hash_engine", HASH_ENGINES, DEFAULT_HASH_ENGINE)),
+        'hash_output_format': compile_item("hash_output_format", lambda: _choice_parameter(parameters, "hash_output_format", HASH_OUTPUT_FORMATS, DEFAULT_HASH_OUTPUT_FORMAT)),
+        'special_functions': null_or("special_functions", compile_special_functions) or [],
+        # Saída: regex do nome do arquivo compilado uma única vez
+        'filename_patterns': [(compile_item("regex_pattern", lambda: re.compile(parameters.get("regex_pattern", "NULL"))), parameters.get("filename_output", "NULL"))],
+        'path_s3': parameters.get("path_s3", "PATH_ERROR"),
+        # Upload em partes do arquivo de saída: tamanho das partes e quantidade de envios simultâneos
+        'upload_part_size': compile_item("upload_part_size_bytes", lambda: _upload_part_size(parameters)),
+        'upload_concurrency': compile_item("upload_concurrency", lambda: max(_int_parameter(parameters, "upload_concurrency", MULTIPART_CONCURRENCY), 1)),
+        'extension_file_target': parameters.get("extension_file_target", "csv"),
+        'output_options': compile_item("extension_file_target", lambda: _output_options(parameters))
+    }
+
+    # Hash sem chave seria reversível por força bruta: rejeitado antes de qualquer leitura
+    hash_functions = [function['name'] for function in plan['special_functions'] if function['name'] in HASH_SPECIAL_FUNCTIONS]
+    if (plan['hash_columns'] or hash_functions) and not hash_key:
+        configured = ", ".join((["hash_columns"] if plan['hash_columns'] else []) + hash_functions)
+        errors.append(f"HASH_KEY: não configurado no Secrets Manager, obrigatório para {configured}")
+
+    if errors:
+        raise ValueError("Arquivo de parametros inválido: " + "; ".join(errors))
+
+    # Colunas mantidas como texto e colunas do add_columns gravadas como um único valor (category)
+    plan['operation_columns'] = _operation_columns(plan)
+    rename_mapping = plan['rename_columns'] or {}
+    plan['broadcast_add_columns'] = set()
+    if plan['categorical_max_unique_pct'] > 0:
+        plan['broadcast_add_columns'] = {
+            column for column in plan['add_columns'] or {}
+            if column not in plan['operation_columns'] and rename_mapping.get(column, column) not in plan['operation_columns']
+        }
+    return plan
+
+# Função que define as colunas do arquivo que precisam ser lidas (projeção de colunas)
+def resolve_read_columns(plan, column_names):
+    """
+    Colunas removidas por drop_columns (pelo nome após rename_columns) não são lidas: add e rename
+    não usam os valores, e date_format, hash_columns e special_functions são aplicados depois do
+    drop, sem acesso a essas colunas.
+    Args:
+        plan (dict): Plano de transformação (compile_transform_plan).
+        column_names (list): Nomes das colunas do arquivo, na ordem (column_names ou cabeçalho).
+    Returns:
+        list: Posições das colunas a serem lidas, ou None para ler todas.
+    """
+    if not plan['drop_columns'] or not column_names:
+        return None
+    dropped = set(plan['drop_columns'])
+    rename_mapping = plan['rename_columns'] or {}
+    # Os nomes das colunas são comparados sem espaços nas pontas, como em prepare_chunk
+    names = [str(name).strip() for name in column_names]
+    read_columns = [position for position, name in enumerate(names) if rename_mapping.get(name, name) not in dropped]
+    # Sem colunas restantes o arquivo seria tratado como vazio: mantém a leitura completa
+    if not read_columns or len(read_columns) == len(names):
+        return None
+    return read_columns
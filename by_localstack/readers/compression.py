@@ -0,0 +1,72 @@
+import bz2
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: só é exigido para arquivos .zst
+    zstandard = None
+
+# Extensões de arquivos comprimidos aceitas no landing-zone (ex.: arquivo.csv.gz, arquivo.dat.zst)
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".bz2": "bz2", ".zst": "zstd", ".zstd": "zstd"}
+
+# Assinaturas (magic bytes) dos formatos comprimidos, usadas quando a extensão não indica compressão
+COMPRESSION_MAGIC_BYTES = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\x28\xb5\x2f\xfd": "zstd"}
+
+# Tamanho dos blocos comprimidos entregues ao descompressor (limita o tamanho de cada bloco descomprimido)
+DECOMPRESS_INPUT_CHUNK_SIZE = 64 * 1024  # 64KB por chunk
+
+# Função que identifica a compressão do arquivo pela extensão ou pelos primeiros bytes
+def detect_compression(file_key, head=b""):
+    """
+    Args:
+        file_key (str): Chave (ou nome) do arquivo.
+        head (bytes): Primeiros bytes do arquivo, quando disponíveis.
+    Returns:
+        str: "gzip", "bz2", "zstd" ou None para arquivos sem compressão.
+    """
+    compression = COMPRESSION_EXTENSIONS.get(os.path.splitext(file_key)[1].lower())
+    if compression is not None:
+        return compression
+    for magic, compression in COMPRESSION_MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+# Função que remove a extensão de compressão do nome do arquivo ("arquivo.csv.gz" -> "arquivo.csv")
+def strip_compression_extension(file_name):
+    root, extension = os.path.splitext(file_name)
+    return root if extension.lower() in COMPRESSION_EXTENSIONS else file_name
+
+# Função que descomprime em streaming uma sequência de blocos comprimidos
+def iter_decompressed_chunks(chunks, compression):
+    """
+    Descomprime bloco a bloco, sem materializar o arquivo descomprimido.
+    Arquivos com vários membros/frames concatenados (ex.: cat a.gz b.gz) são lidos por completo.
+    """
+    decompressor = None
+    for chunk in chunks:
+        while chunk:
+            if decompressor is None:
+                decompressor = _new_decompressor(compression)
+            yield decompressor.decompress(chunk)
+            if decompressor.eof:
+                chunk = decompressor.unused_data
+                decompressor = None
+            else:
+                chunk = b""
+
+    if decompressor is not None:
+        raise EOFError(f"Arquivo {compression} truncado: fim do conteúdo comprimido não encontrado")
+
+# Função que cria o descompressor incremental do formato informado
+def _new_decompressor(compression):
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if compression == "bz2":
+        return bz2.BZ2Decompressor()
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard não está instalado: necessário para ler arquivos .zst")
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Compressão não suportada: {compression}")
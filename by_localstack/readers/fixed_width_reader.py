@@ -0,0 +1,277 @@
+import mmap
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import as_strided
+from readers.input_spool import spool_source
+from readers.byte_ranges import is_line_range
+from readers.arrow_csv_reader import PANDAS_NA_VALUES, pandas_header_names
+
+# Caracteres removidos das pontas de cada campo (mesmo comportamento do pd.read_fwf)
+FWF_STRIP_CHARS = b" \t\r\n"
+
+# Tabela (byte -> bool) dos caracteres de FWF_STRIP_CHARS, usada para identificar linhas vazias sem recortar os campos
+FWF_BLANK_BYTES = np.zeros(256, dtype=bool)
+FWF_BLANK_BYTES[np.frombuffer(FWF_STRIP_CHARS, dtype=np.uint8)] = True
+
+# Bloco (em bytes) usado na busca das quebras de linha
+NEWLINE_SCAN_BLOCK = 64 * 1024 * 1024
+
+# Quantidade de linhas copiadas por vez para a matriz de registros quando o tamanho das linhas varia
+GATHER_BLOCK_ROWS = 16384
+
+# Função que lê um arquivo posicional sobre o spool mapeado em memória (mmap)
+def read_fwf_mmap(spool, widths, encoding, skip_rows, columns_list, chunk_size_rows=0, usecols=None):
+    """
+    Lê o arquivo posicional recortando os campos por offset de bytes, de forma vetorizada,
+    com a mesma semântica do pd.read_fwf usado em process_file_generic:
+      - skip_rows = 0: a primeira linha é o cabeçalho;
+      - skip_rows > 0: pula skip_rows linhas e usa columns_list como nomes;
+      - campos sem espaços nas pontas, vazios e valores nulos padrão do pandas viram NaN;
+      - linhas com todos os campos vazios são ignoradas.
+    Quando todas as linhas têm o mesmo tamanho, os registros são lidos por uma view NumPy de
+    tamanho fixo sobre o mmap, sem índice de linhas. Apenas os campos recortados são decodificados,
+    e com usecols (projeção) os campos das demais colunas nem são recortados.
+    Se o encoding tiver caracteres multibyte e o arquivo não for ASCII, offsets de bytes e de
+    caracteres não coincidem e a leitura é feita pelo pd.read_fwf.
+    Args:
+        spool: Spool do arquivo de entrada (caminho local, bytes ou intervalo do modo por intervalos).
+        widths (list): Larguras dos campos (parametro widths).
+        encoding (str): Encoding do arquivo (encoding_file_read).
+        skip_rows (int): Quantidade de linhas a pular.
+        columns_list (list): Nomes das colunas quando skip_rows > 0.
+        chunk_size_rows (int): Quando > 0, devolve um iterador de DataFrames com até chunk_size_rows linhas.
+        usecols (list): Posições das colunas a carregar (projeção), None = todas.
+    Returns:
+        DataFrame ou iterador de DataFrames.
+    """
+    buffer, data, position = _map_spool(spool)
+    prefix = spool['prefix'] if is_line_range(spool) else b""
+
+    if not _byte_offsets_match_chars(np.frombuffer(prefix, dtype=np.uint8), encoding) or not _byte_offsets_match_chars(data[position:], encoding):
+        print(f"Aviso: encoding {encoding} com caracteres multibyte no arquivo, utilizando pd.read_fwf.")
+        return pd.read_fwf(
+            spool_source(spool),
+            widths=widths,
+            encoding=encoding,
+            skiprows=skip_rows,
+            names=columns_list if skip_rows > 0 else None,
+            usecols=usecols,
+            dtype=str,
+            chunksize=chunk_size_rows or None
+        )
+
+    frames = _iter_fwf_frames(buffer, data, position, widths, encoding, skip_rows, columns_list, chunk_size_rows, usecols, prefix)
+    if chunk_size_rows > 0:
+        return frames
+
+    data_frame = next(frames)
+    frames.close()
+    return data_frame
+
+# Função que mapeia o spool como um array de bytes NumPy (sem cópia)
+def _map_spool(spool):
+    """
+    Returns:
+        (buffer, array de bytes, posição inicial dos dados no array). Em um intervalo do modo por
+        intervalos apenas o trecho do arquivo até o fim do intervalo é mapeado (o mmap começa em um
+        offset alinhado a ALLOCATIONGRANULARITY) e os dados começam na posição devolvida.
+    """
+    if isinstance(spool, (bytes, bytearray)):
+        return spool, np.frombuffer(spool, dtype=np.uint8), 0
+    path, start, end = (spool['path'], spool['start'], spool['end']) if is_line_range(spool) else (spool, 0, None)
+    with open(path, "rb") as spool_file:
+        if end is None:
+            end = os.fstat(spool_file.fileno()).st_size
+        if end <= start:
+            return b"", np.empty(0, dtype=np.uint8), 0
+        # O mmap continua válido após o fechamento do arquivo e é liberado junto com o array
+        offset = start - start % mmap.ALLOCATIONGRANULARITY
+        mapped = mmap.mmap(spool_file.fileno(), end - offset, access=mmap.ACCESS_READ, offset=offset)
+    return mapped, np.frombuffer(mapped, dtype=np.uint8), start - offset
+
+# Função que verifica se offsets de bytes equivalem a offsets de caracteres no arquivo
+def _byte_offsets_match_chars(data, encoding):
+    # Encodings que não preservam o ASCII (ex.: UTF-16) não podem ser recortados por bytes
+    if "A\n".encode(encoding) != b"A\n":
+        return False
+    # Encodings de 1 byte por caractere (Latin-1, Windows-1252, ...)
+    if len(b"\xc3\xa9".decode(encoding, errors="replace")) == 2:
+        return True
+    # Encodings multibyte (UTF-8): válido apenas se o conteúdo for ASCII
+    start = 3 if data[:3].tobytes() == b"\xef\xbb\xbf" else 0
+    for offset in range(start, data.size, NEWLINE_SCAN_BLOCK):
+        if (data[offset:offset + NEWLINE_SCAN_BLOCK] >= 0x80).any():
+            return False
+    return True
+
+# Função que gera os DataFrames do arquivo posicional
+def _iter_fwf_frames(buffer, data, position, widths, encoding, skip_rows, columns_list, chunk_size_rows, usecols=None, prefix=b""):
+    colspecs = list(zip(np.cumsum([0] + widths[:-1]).tolist(), np.cumsum(widths).tolist()))
+    record_width = colspecs[-1][1] if colspecs else 0
+
+    # As linhas de skip_rows e o cabeçalho são lidos primeiro do prefixo (modo por intervalos) e depois dos dados
+    segments = [(prefix, np.frombuffer(prefix, dtype=np.uint8), 0)] if prefix else []
+    segments.append((buffer, data, position))
+    lines_to_skip = skip_rows
+    header = []
+    for index, (segment_buffer, segment_data, position) in enumerate(segments):
+        # Pula o BOM do UTF-8 (início do arquivo) e as linhas de skip_rows
+        if index == 0 and segment_data[position:position + 3].tobytes() == b"\xef\xbb\xbf":
+            position += 3
+        while lines_to_skip > 0 and position < segment_data.size:
+            position = _next_line(segment_buffer, segment_data, position)[2]
+            lines_to_skip -= 1
+
+        # O cabeçalho é a primeira linha com algum campo preenchido
+        while skip_rows == 0 and position < segment_data.size and not any(header):
+            line_start, line_end, position = _next_line(segment_buffer, segment_data, position)
+            line = segment_data[line_start:line_end].tobytes()
+            header = [line[start:end].strip(FWF_STRIP_CHARS).decode(encoding) for start, end in colspecs]
+
+    if skip_rows > 0:
+        names = list(columns_list) if columns_list else list(range(len(colspecs)))
+    else:
+        names = pandas_header_names(header)
+
+    # Projeção: apenas os campos das colunas de usecols são recortados
+    field_specs = colspecs
+    if usecols is not None:
+        field_specs = [colspecs[position] for position in usecols]
+        names = [names[position] for position in usecols]
+
+    emitted = False
+    for records in _iter_record_blocks(data, position, record_width, chunk_size_rows):
+        data_frame = _records_to_frame(records, field_specs, names, encoding, record_width if usecols is not None else None)
+        if data_frame.empty and emitted:
+            continue
+        emitted = True
+        yield data_frame
+
+    if not emitted:
+        yield pd.DataFrame({name: pd.Series(dtype=object) for name in names})
+
+# Função que devolve (início, fim sem quebra de linha, início da próxima linha) a partir de uma posição
+def _next_line(buffer, data, position):
+    newline = buffer.find(b"\n", position)
+    next_position = data.size if newline == -1 else newline + 1
+    line_end = data.size if newline == -1 else newline
+    if line_end > position and data[line_end - 1] == 13:
+        line_end -= 1
+    return position, line_end, next_position
+
+# Função que gera blocos de registros (matriz linhas x bytes) a partir de uma posição do arquivo
+def _iter_record_blocks(data, position, record_width, chunk_size_rows):
+    body = data[position:]
+    if body.size == 0:
+        return
+
+    fixed = _fixed_record_layout(body)
+    if fixed is not None:
+        # Registros de tamanho fixo: view NumPy (linhas x bytes) direto sobre o mmap
+        record_length, content_length, n_records = fixed
+        records = as_strided(body, shape=(n_records, content_length), strides=(record_length, 1), writeable=False)
+        step = chunk_size_rows or n_records
+        for start in range(0, n_records, step):
+            yield records[start:start + step]
+        return
+
+    # Registros de tamanho variável: índice das linhas e cópia para uma matriz de largura fixa
+    starts, ends = _line_bounds(body)
+    step = chunk_size_rows or len(starts)
+    for start in range(0, len(starts), step):
+        yield _gather_records(body, starts[start:start + step], ends[start:start + step], record_width)
+
+# Função que identifica se todas as linhas têm o mesmo tamanho (registro fixo)
+def _fixed_record_layout(body):
+    """
+    Returns:
+        (tamanho do registro com quebra de linha, tamanho do conteúdo, quantidade de registros)
+        ou None quando as linhas não têm tamanho constante.
+    """
+    newlines = np.flatnonzero(body[:NEWLINE_SCAN_BLOCK] == 10)
+    if newlines.size == 0:
+        return None
+    record_length = int(newlines[0]) + 1
+    if record_length < 2:
+        return None
+
+    # O último registro pode não ter quebra de linha
+    if body.size % record_length == 0:
+        n_records = body.size // record_length
+    elif (body.size + 1) % record_length == 0:
+        n_records = (body.size + 1) // record_length
+    else:
+        return None
+
+    if not (body[record_length - 1::record_length] == 10).all():
+        return None
+
+    content_length = record_length - 1
+    carriage_returns = body[record_length - 2::record_length] == 13
+    if carriage_returns.all() and carriage_returns.size == n_records:
+        content_length -= 1
+    elif carriage_returns.any():
+        return None
+    return record_length, content_length, n_records
+
+# Função que localiza o início e o fim (sem \r\n) de cada linha
+def _line_bounds(body):
+    newlines = np.concatenate([
+        np.flatnonzero(body[offset:offset + NEWLINE_SCAN_BLOCK] == 10) + offset
+        for offset in range(0, body.size, NEWLINE_SCAN_BLOCK)
+    ])
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [body.size]))
+    if starts[-1] >= body.size:
+        starts, ends = starts[:-1], ends[:-1]
+    has_carriage_return = (ends > starts) & (body[np.maximum(ends - 1, 0)] == 13)
+    return starts, ends - has_carriage_return
+
+# Função que copia linhas de tamanho variável para uma matriz (linhas x record_width) completada com espaços
+def _gather_records(body, starts, ends, record_width):
+    records = np.full((len(starts), record_width), ord(" "), dtype=np.uint8)
+    flat = records.reshape(-1)
+    for block in range(0, len(starts), GATHER_BLOCK_ROWS):
+        block_starts = starts[block:block + GATHER_BLOCK_ROWS]
+        lengths = np.minimum(ends[block:block + GATHER_BLOCK_ROWS] - block_starts, record_width)
+        total = int(lengths.sum())
+        if total == 0:
+            continue
+        offsets_in_line = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        destination = np.repeat((np.arange(len(block_starts)) + block) * record_width, lengths) + offsets_in_line
+        flat[destination] = body[np.repeat(block_starts, lengths) + offsets_in_line]
+    return records
+
+# Função que recorta os campos de um bloco de registros e monta o DataFrame
+def _records_to_frame(records, colspecs, names, encoding, record_width=None):
+    """
+    record_width: quando informado (projeção), as linhas vazias são identificadas pelos bytes do
+    registro inteiro e não pelos campos recortados, que são apenas parte das colunas.
+    """
+    content_length = records.shape[1]
+    na_values = np.array([value.encode(encoding) for value in PANDAS_NA_VALUES])
+    keep = np.zeros(records.shape[0], dtype=bool)
+    if record_width is not None:
+        for block in range(0, records.shape[0], GATHER_BLOCK_ROWS):
+            block_bytes = records[block:block + GATHER_BLOCK_ROWS, :min(record_width, content_length)]
+            keep[block:block + GATHER_BLOCK_ROWS] = ~FWF_BLANK_BYTES[block_bytes].all(axis=1)
+    fields = []
+
+    for start, end in colspecs:
+        start, end = min(start, content_length), min(end, content_length)
+        if end <= start:
+            fields.append(np.full(records.shape[0], b"", dtype="S1"))
+            continue
+        field = np.ascontiguousarray(records[:, start:end]).view(f"S{end - start}").ravel()
+        field = np.char.strip(field, FWF_STRIP_CHARS)
+        keep |= field != b""
+        fields.append(field)
+
+    columns = {}
+    for name, field in zip(names, fields):
+        field = field[keep]
+        values = np.char.decode(field, encoding).astype(object)
+        values[np.isin(field, na_values)] = np.nan
+        columns[name] = values
+    return pd.DataFrame(columns)
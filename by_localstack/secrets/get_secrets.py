@@ -45,6 +45,7 @@ try:
     secrets = get_secret()
     AWS_REGION = secrets.get("AWS_REGION", "us-east-1")
     SNS_TOPIC_ARN = secrets.get("SNS_TOPIC_ARN", "")
+    HASH_KEY = secrets.get("HASH_KEY", "")
 except Exception as e:
     print(f"Erro ao configurar variáveis de ambiente: {e}")
     raise
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Upload em partes (multipart) dos arquivos do transient-zone
+MULTIPART_PART_SIZE = 16 * 1024 * 1024  # 16MB por parte
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024  # mínimo do S3 para as partes (exceto a última)
+MULTIPART_CONCURRENCY = 4
+
+# Tamanho dos blocos lidos dos arquivos locais enviados em partes
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024  # 1MB por chunk
+
+# Função que envia ao S3 um conteúdo gerado em blocos de bytes, em partes enviadas em paralelo
+def upload_stream_to_s3(s3_client, bucket_name, key, byte_chunks, part_size=MULTIPART_PART_SIZE, max_concurrency=MULTIPART_CONCURRENCY, extra_args=None):
+    """
+    Os blocos são acumulados até part_size bytes e cada parte é enviada (upload_part) assim que
+    fica completa, com até max_concurrency partes em envio ao mesmo tempo: a memória fica limitada
+    a cerca de (max_concurrency + 1) * part_size, independente do tamanho do arquivo.
+    Conteúdos menores que uma parte são enviados com um único put_object.
+    extra_args (ex.: ContentType) é aplicado ao objeto nos dois casos.
+    Qualquer erro (na geração dos blocos ou no envio) aborta o upload em partes, sem deixar partes
+    órfãs cobradas no bucket, e é propagado para o chamador.
+    Returns:
+        int: Quantidade de bytes enviados.
+    """
+    pending = []
+    pending_size = 0
+    total_size = 0
+    upload_id = None
+    executor = None
+    in_flight = set()
+    etags = {}
+    part_count = 0
+
+    def send_part(part_number, body):
+        response = s3_client.upload_part(Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body)
+        etags[part_number] = response['ETag']
+
+    def submit_pending():
+        nonlocal pending, pending_size, in_flight, part_count
+        # Limita as partes em memória: aguarda um envio terminar antes de gerar a próxima
+        while len(in_flight) >= max_concurrency:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        part_count += 1
+        in_flight.add(executor.submit(send_part, part_count, b"".join(pending)))
+        pending = []
+        pending_size = 0
+
+    try:
+        for chunk in byte_chunks:
+            if not chunk:
+                continue
+            pending.append(chunk)
+            pending_size += len(chunk)
+            total_size += len(chunk)
+            if pending_size >= part_size:
+                if upload_id is None:
+                    upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=key, **(extra_args or {}))['UploadId']
+                    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+                submit_pending()
+
+        if upload_id is None:
+            s3_client.put_object(Bucket=bucket_name, Key=key, Body=b"".join(pending), **(extra_args or {}))
+            return total_size
+
+        if pending:
+            submit_pending()
+        for future in in_flight:
+            future.result()
+        in_flight = set()
+        s3_client.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etags[number]} for number in sorted(etags)]}
+        )
+        print(f"# Upload em partes concluído: {len(etags)} parte(s), {total_size} bytes")
+        return total_size
+
+    except BaseException:
+        if upload_id is not None:
+            for future in in_flight:
+                future.cancel()
+            wait(in_flight)
+            try:
+                s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id)
+                print(f"# Upload em partes abortado: s3://{bucket_name}/{key}")
+            except Exception as abort_error:
+                print(f"Erro ao abortar o upload em partes de s3://{bucket_name}/{key}: {abort_error}")
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+# Função que lê arquivos locais em sequência, em blocos de bytes
+def iter_file_bytes(paths, chunk_size=UPLOAD_READ_CHUNK_SIZE):
+    for path in paths:
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                yield chunk
@@ -0,0 +1,7 @@
+import pytest
+from project_modules import import_project_module, TREES
+
+# Fixture que executa os testes em cada árvore, devolvendo a função de import dos módulos dela
+@pytest.fixture(scope="module", params=TREES)
+def project(request):
+    return lambda module_name: import_project_module(request.param, module_name)
@@ -0,0 +1,66 @@
+import importlib
+import importlib.util
+import os
+import sys
+import types
+
+# Raiz do repositório e árvores do projeto (o mesmo código é publicado em by_aws e by_localstack)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TREES = ("by_aws", "by_localstack")
+
+# Pacotes do projeto, descarregados ao trocar de árvore
+PROJECT_PACKAGES = ("clients", "messaging", "operations", "parameters", "readers", "special_functions", "writers")
+
+# E-mails de erro enviados pelos módulos nos testes e benchmarks (send_mail_exception não acessa o SNS)
+SENT_MAILS = []
+
+# Função que substitui os imports da AWS e do envio de e-mails, indisponíveis nos testes e benchmarks
+def _install_stubs():
+    """
+    boto3 só é substituído quando não está instalado; testes e benchmarks não acessam o S3.
+    messaging.publish_message é sempre substituído: ele importa secrets.get_secrets, que
+    conflita com o módulo secrets da biblioteca padrão, e publicaria no SNS.
+    """
+    try:
+        import boto3  # noqa: F401
+    except ImportError:
+        boto3 = types.ModuleType("boto3")
+        boto3.client = lambda *args, **kwargs: None
+        sys.modules["boto3"] = boto3
+
+    publish_message = types.ModuleType("messaging.publish_message")
+    publish_message.send_mail_exception = lambda **kwargs: SENT_MAILS.append(kwargs)
+    publish_message.publish_message_to_sns = lambda *args, **kwargs: None
+    sys.modules["messaging.publish_message"] = publish_message
+
+# Função que carrega o pacote special_functions com as funções de special-functions.py
+def _load_special_functions(tree_path):
+    """
+    O arquivo special-functions.py tem hífen no nome e o código importa as funções direto do
+    pacote (from special_functions import ...): as funções são expostas no pacote, como no deploy.
+    """
+    package = types.ModuleType("special_functions")
+    package.__path__ = [os.path.join(tree_path, "special_functions")]
+    sys.modules["special_functions"] = package
+    spec = importlib.util.spec_from_file_location(
+        "special_functions.special_functions",
+        os.path.join(tree_path, "special_functions", "special-functions.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    for name, value in vars(module).items():
+        if not name.startswith("__"):
+            setattr(package, name, value)
+
+# Função que importa um módulo do projeto a partir da árvore informada
+def import_project_module(tree, module_name):
+    tree_path = os.path.join(REPO_ROOT, tree)
+    for name in list(sys.modules):
+        if name.split(".")[0] in PROJECT_PACKAGES:
+            del sys.modules[name]
+    sys.path[:] = [path for path in sys.path if path not in [os.path.join(REPO_ROOT, name) for name in TREES]]
+    sys.path.insert(0, tree_path)
+    _install_stubs()
+    _load_special_functions(tree_path)
+    return importlib.import_module(module_name)
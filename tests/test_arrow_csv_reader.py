@@ -0,0 +1,64 @@
+import io
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+# Linhas do arquivo grande: acima do bloco lido por vez pelo Arrow (1 MB), para que blocos já
+# tenham sido devolvidos quando a linha irregular aparece
+LARGE_ROWS = 120000
+
+# Arquivos de teste: (conteúdo, skip_rows, columns_list, n_cols, usecols, tamanhos de bloco comparados)
+TEST_FILES = {
+    "regular": (b"a;b;c\n1;2;3\n4;;NULL\n7;8;9\n", 0, None, 3, None, [0, 2]),
+    "ragged_rows": (b"a;b;c\n1;2;3\n4;5\n6;7;8;9\nTRL;0003\n", 0, None, 3, None, [0, 2]),
+    "short_trailer": (b"a;b;c\n1;2;3\n4;5;6\nTRL;0002\n", 0, None, 3, None, [0, 2]),
+    "short_trailer_skip_rows": (b"HDR;20240101;x\n1;2;3\n4;5;6\n7;8;9\nTRL;0003\n", 1, ["x", "y", "z"], 3, None, [0, 2]),
+    "ragged_rows_usecols": (b"a;b;c;d\n1;2;3;4\n5;6\n7;8;9;10;11\n", 0, None, 4, [0, 2], [0, 2]),
+    "large_short_trailer": (
+        b"a;b;c\n" + b"".join(b"%d;valor_%d;%d\n" % (i, i, i * 7) for i in range(LARGE_ROWS)) + b"TRL;%d\n" % LARGE_ROWS,
+        0, None, 3, None, [0, 50000]
+    ),
+}
+
+# Função que lê o arquivo pela engine pandas, como em read_input_file (hash-processing.py)
+def read_csv_pandas(content, skip_rows, columns_list, n_cols, usecols, chunk_size_rows):
+    return pd.read_csv(
+        io.BytesIO(content),
+        sep=";",
+        encoding="utf-8",
+        dtype=pd.StringDtype("pyarrow"),
+        skiprows=skip_rows,
+        header=None if skip_rows > 0 else 0,
+        names=columns_list if skip_rows > 0 else None,
+        index_col=None,
+        usecols=usecols if usecols is not None else range(n_cols),
+        chunksize=chunk_size_rows or None
+    )
+
+# Função que devolve a lista de blocos lidos (um único DataFrame quando a leitura não é em blocos)
+def read_frames(data, chunk_size_rows):
+    frames = list(data) if chunk_size_rows > 0 else [data]
+    return [frame.reset_index(drop=True) for frame in frames]
+
+# Teste de equivalência: engine Arrow x engine pandas, com o arquivo inteiro e em blocos
+@pytest.mark.parametrize("file_name,chunk_size_rows", [
+    (file_name, chunk_size_rows) for file_name, test_file in TEST_FILES.items() for chunk_size_rows in test_file[-1]
+])
+def test_read_csv_arrow_matches_pandas(project, file_name, chunk_size_rows):
+    """
+    Linhas com menos colunas que o cabeçalho (ex.: trailer removido por delete_last_row) são
+    completadas com nulo e os campos excedentes são ignorados, como no pd.read_csv.
+    """
+    read_csv_arrow = project("readers.arrow_csv_reader").read_csv_arrow
+    content, skip_rows, columns_list, n_cols, usecols, _ = TEST_FILES[file_name]
+
+    expected = read_frames(read_csv_pandas(content, skip_rows, columns_list, n_cols, usecols, chunk_size_rows), chunk_size_rows)
+    result = read_frames(
+        read_csv_arrow(content, ";", "utf-8", skip_rows, columns_list, n_cols, chunk_size_rows=chunk_size_rows, usecols=usecols),
+        chunk_size_rows
+    )
+
+    assert [len(frame) for frame in result] == [len(frame) for frame in expected]
+    for result_frame, expected_frame in zip(result, expected):
+        pd.testing.assert_frame_equal(result_frame, expected_frame)
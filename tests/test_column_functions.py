@@ -0,0 +1,77 @@
+import random
+import pandas as pd
+
+# Quantidade de colunas aleatórias comparadas e chave usada nas funções de hash
+TEST_TRIALS = 300
+TEST_HASH_KEY = "chave-de-teste"
+
+# Dtypes de texto com que as colunas chegam em apply_special_functions
+TEST_DTYPES = (object, "string[python]", "string[pyarrow]")
+
+# Caracteres fora do caminho vetorizado: espaços, sinais, "_" e dígitos não ASCII
+TEST_ALPHABET = ["0", "1", "9", " ", "+", "-", "_", "a", "١", "٣"]
+
+# Função que gera um valor aleatório: sentinela, só dígitos ASCII ou texto qualquer
+def random_value(rng, special_functions):
+    kind = rng.random()
+    if kind < 0.1:
+        return rng.choice(special_functions.TRAZA_DOC_SKIP_VALUES + special_functions.VALE_SKIP_VALUES + ["", "0", "00"])
+    if kind < 0.5:
+        return "".join(rng.choice("0123456789") for _ in range(rng.choice([1, 5, 9, 11, 12])))
+    return "".join(rng.choice(TEST_ALPHABET) for _ in range(rng.randint(0, 12)))
+
+# Função que aplica a função escalar linha a linha, devolvendo None se alguma linha gerar erro
+def scalar_result(func, rows):
+    try:
+        return [func(*row) for row in rows]
+    except Exception:
+        return None
+
+# Função que aplica a função de COLUMN_FUNCTIONS, devolvendo None se gerar erro
+def column_result(special_functions, func_name, data, args, hash_options):
+    try:
+        return list(special_functions.COLUMN_FUNCTIONS[func_name](data, args, hash_options))
+    except Exception:
+        return None
+
+# Teste diferencial: funções escalares x COLUMN_FUNCTIONS em colunas aleatórias
+def test_column_functions_match_scalar_functions(project):
+    """
+    Para cada coluna aleatória (object, string[python] e string[pyarrow]) confere que a versão
+    vetorizada devolve os mesmos valores da função escalar aplicada linha a linha, ou que as duas
+    geram erro (ex.: int() de um texto que não é número).
+    """
+    special_functions = project("special_functions")
+    rng = random.Random(7)
+    hash_options = {'hash_engine': special_functions.DEFAULT_HASH_ENGINE, 'hash_key': TEST_HASH_KEY}
+    scalar_functions = {
+        "skip_hash_traza_doc": lambda value: special_functions.skip_hash_traza_doc(value, **hash_options),
+        "skip_hash_vale": lambda value: special_functions.skip_hash_vale(value, **hash_options),
+        "delete_cero": special_functions.delete_cero,
+        "toInt": special_functions.toInt,
+        "isInt": special_functions.isInt,
+        "delete_any": special_functions.delete_any,
+    }
+    mismatches = []
+    for trial in range(TEST_TRIALS):
+        rows = rng.randint(0, 60)
+        values = [random_value(rng, special_functions) for _ in range(rows)]
+        dtype = rng.choice(TEST_DTYPES)
+        data = pd.DataFrame({
+            'oper': pd.Series(values, dtype=dtype),
+            'prod': pd.Series([rng.choice(["1", "2", "3"]) for _ in range(rows)], dtype=object),
+            'mod_tx': pd.Series([random_value(rng, special_functions) for _ in range(rows)], dtype=object),
+        })
+        for func_name, func in scalar_functions.items():
+            expected = scalar_result(func, [(value,) for value in values])
+            if column_result(special_functions, func_name, data, ["oper"], hash_options) != expected:
+                mismatches.append((func_name, str(dtype), values))
+        for tx_or_oper in ("tx", "oper"):
+            expected = scalar_result(
+                lambda oper, prod, mod_tx: special_functions.hash_if(oper, prod, mod_tx, tx_or_oper, **hash_options),
+                list(zip(values, data['prod'], data['mod_tx']))
+            )
+            if column_result(special_functions, "hash_if", data, ["oper", "prod", "mod_tx", tx_or_oper], hash_options) != expected:
+                mismatches.append((f"hash_if:{tx_or_oper}", str(dtype), values))
+
+    assert mismatches == [], f"{len(mismatches)} divergência(s), ex.: {mismatches[:3]}"
@@ -0,0 +1,38 @@
+import pytest
+
+# Parametros mínimos de uma tabela delimitada
+BASE_PARAMETERS = {
+    "name": "tabela", "extension_file": "csv", "separator_file_read": ";", "encoding_file_read": "utf-8",
+    "regex_pattern": "arq_\\d{8}", "filename_output": "saida_", "path_s3": "saida", "widths": "NULL"
+}
+
+# Teste: funções especiais registradas são resolvidas no plano
+def test_special_functions_resolves_registered_functions(project):
+    compile_transform_plan = project("parameters.transform_plan").compile_transform_plan
+    parameters = dict(BASE_PARAMETERS, special_functions="concat_fields:fecha:hora:fecha_hora,hash_if:oper:prod:mod:tx:tx2")
+
+    plan = compile_transform_plan(parameters, hash_key="chave-de-teste")
+
+    assert [function['name'] for function in plan['special_functions']] == ["concat_fields", "hash_if"]
+    assert plan['special_functions'][1]['column_func'] is not None
+
+# Teste: nomes do módulo que não são funções especiais são rejeitados na compilação do plano
+def test_special_functions_rejects_unregistered_names(project):
+    compile_transform_plan = project("parameters.transform_plan").compile_transform_plan
+    parameters = dict(
+        BASE_PARAMETERS,
+        special_functions="pd:a:b,time:a:b,extract_fecha_ref:a:b,concat_fields:fecha:hora:fecha_hora,delete_cero:a:b:c",
+        chunk_size_rows="x"
+    )
+
+    with pytest.raises(ValueError) as error:
+        compile_transform_plan(parameters)
+
+    message = str(error.value)
+    assert message.startswith("Arquivo de parametros inválido: ")
+    for func_name in ("pd", "time", "extract_fecha_ref"):
+        assert f"Função especial '{func_name}' não definida no codigo" in message
+    assert "Função especial 'delete_cero' espera 1 argumento(s)" in message
+    assert "Função especial 'concat_fields'" not in message
+    # Os demais erros do arquivo de parametros continuam na mesma mensagem
+    assert "chunk_size_rows" in message